@@ -0,0 +1,155 @@
+import asyncio
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from .metrics import COALESCE_INFLIGHT, COALESCE_REQUESTS
+
+# In-flight computations of this worker process
+_INFLIGHT = {}  # sync views:  key -> _Call
+_ASYNC_INFLIGHT = {}  # async views: (event loop, key) -> asyncio.Future
+_LOCK = threading.Lock()  # protect concurrent access to _INFLIGHT
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+def get_max_wait():
+    """
+    Max seconds a follower waits for the leader before computing on its own.
+    Example in settings.py:
+        COALESCE_MAX_WAIT = 2.0
+    """
+    return getattr(settings, "COALESCE_MAX_WAIT", 2.0)
+
+
+def _enabled():
+    return getattr(settings, "COALESCE_ENABLED", True)
+
+
+def _key(request, vary):
+    # Same path + query string + vary headers → same result
+    parts = [request.method, request.get_full_path()]
+    parts += [request.headers.get(h, "") for h in vary]
+    return "|".join(parts)
+
+
+def _snapshot(response):
+    # DRF responses are rendered lazily; followers need the final bytes
+    if hasattr(response, "render") and not getattr(response, "is_rendered", True):
+        response.render()
+    if response.streaming:
+        return None
+    return response.status_code, response.content, list(response.items())
+
+
+def _rebuild(snapshot):
+    # Every follower gets its own response object (middlewares mutate headers)
+    status, content, headers = snapshot
+    response = HttpResponse(content, status=status)
+    for name, value in headers:
+        response[name] = value
+    response["X-Coalesced"] = "true"
+    return response
+
+
+def coalesce(endpoint, max_wait=None, vary=("Accept", "Accept-Encoding")):
+    """
+    Share one in-flight computation between concurrent identical GETs.
+
+    The first request (leader) runs the view, concurrent requests with the same
+    key (followers) wait up to `max_wait` seconds and receive a copy of its
+    response. On timeout or leader failure, followers run the view themselves.
+
+    Followers do not run the view: per-request side effects (request metrics,
+    audit events) must live in a decorator outside this one (track_request in
+    app/views.py), not in the view body.
+
+    Usage (opt-in per route):
+        @coalesce("json_sync_get")
+        def json_sync_get_view(request): ...
+    """
+
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method != "GET" or not _enabled():
+                    return await view(request, *args, **kwargs)
+
+                # Futures belong to one event loop
+                key = (asyncio.get_running_loop(), _key(request, vary))
+                future = _ASYNC_INFLIGHT.get(key)
+
+                if future is None:
+                    future = asyncio.get_running_loop().create_future()
+                    _ASYNC_INFLIGHT[key] = future
+                    COALESCE_REQUESTS.labels(endpoint=endpoint, role="leader").inc()
+                    COALESCE_INFLIGHT.labels(endpoint=endpoint).inc()
+                    snapshot = None
+                    try:
+                        response = await view(request, *args, **kwargs)
+                        snapshot = _snapshot(response)
+                        return response
+                    finally:
+                        _ASYNC_INFLIGHT.pop(key, None)
+                        COALESCE_INFLIGHT.labels(endpoint=endpoint).dec()
+                        future.set_result(snapshot)
+
+                try:
+                    snapshot = await asyncio.wait_for(
+                        asyncio.shield(future), max_wait or get_max_wait()
+                    )
+                except asyncio.TimeoutError:
+                    snapshot = None
+
+                if snapshot is None:
+                    COALESCE_REQUESTS.labels(endpoint=endpoint, role="timeout").inc()
+                    return await view(request, *args, **kwargs)
+
+                COALESCE_REQUESTS.labels(endpoint=endpoint, role="follower").inc()
+                return _rebuild(snapshot)
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != "GET" or not _enabled():
+                return view(request, *args, **kwargs)
+
+            key = _key(request, vary)
+            with _LOCK:
+                call = _INFLIGHT.get(key)
+                is_leader = call is None
+                if is_leader:
+                    call = _INFLIGHT[key] = _Call()
+
+            if is_leader:
+                COALESCE_REQUESTS.labels(endpoint=endpoint, role="leader").inc()
+                COALESCE_INFLIGHT.labels(endpoint=endpoint).inc()
+                try:
+                    response = view(request, *args, **kwargs)
+                    call.result = _snapshot(response)
+                    return response
+                finally:
+                    with _LOCK:
+                        _INFLIGHT.pop(key, None)
+                    COALESCE_INFLIGHT.labels(endpoint=endpoint).dec()
+                    call.event.set()
+
+            if call.event.wait(max_wait or get_max_wait()) and call.result is not None:
+                COALESCE_REQUESTS.labels(endpoint=endpoint, role="follower").inc()
+                return _rebuild(call.result)
+
+            COALESCE_REQUESTS.labels(endpoint=endpoint, role="timeout").inc()
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
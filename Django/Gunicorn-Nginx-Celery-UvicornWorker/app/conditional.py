@@ -0,0 +1,93 @@
+import asyncio
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .versioning import get_events_version, get_items_version
+
+
+def get_max_age():
+    """
+    Seconds a client / nginx may reuse a response before revalidating it.
+    Example in settings.py:
+        HTTP_CACHE_MAX_AGE = 5
+    """
+    return getattr(settings, "HTTP_CACHE_MAX_AGE", 5)
+
+
+# --------------------
+# Validators (cheap: no query on the data itself)
+# --------------------
+def items_etag(request, *args, **kwargs):
+    """
+    ETag of every response computed from the Item table: its write version.
+
+    One Redis GET; app/signals.py bumps the version after each committed write.
+    Weak (W/): the bodies also carry duration_ms, they are equal in meaning only.
+    """
+    return f'W/"items-v{get_items_version()}"'
+
+
+def events_etag(request, *args, **kwargs):
+    """
+    ETag of the latest-events list: the request_events write version.
+
+    Bumped after every insert. Not the newest ObjectId: ids from different
+    workers / relays are not monotonic, a new event can land in the top 50
+    without changing it (and within the same second of a Last-Modified).
+    Weak (W/): the body carries duration_ms.
+    """
+    return f'W/"events-v{get_events_version()}"'
+
+
+# --------------------
+# Decorator
+# --------------------
+def conditional(
+    etag_func=None, last_modified_func=None, vary=("Accept", "Accept-Encoding")
+):
+    """
+    Conditional GET for a view: ETag / Last-Modified, 304 and cache headers.
+
+    - The validators run BEFORE the view: when the client's If-None-Match /
+      If-Modified-Since still matches, Django answers 304 without running the
+      view (no DB query, no Mongo insert).
+    - Every 200 / 304 gets `Cache-Control: public, max-age=<HTTP_CACHE_MAX_AGE>`
+      and `Vary`, so nginx (proxy_cache + proxy_cache_revalidate) can store the
+      body and revalidate it with the same cheap request.
+
+    Usage (outermost, so a 304 skips coalescing / caching as well):
+        @conditional(items_etag)
+        @coalesce("json_sync_get")
+        def json_sync_get_view(request): ...
+    """
+
+    def patch(response):
+        if response.status_code in (200, 304):
+            patch_cache_control(response, public=True, max_age=get_max_age())
+            patch_vary_headers(response, vary)
+        return response
+
+    def decorator(view):
+        # Django's condition() supports sync and async views
+        checked = condition(
+            etag_func=etag_func, last_modified_func=last_modified_func
+        )(view)
+
+        if asyncio.iscoroutinefunction(view):
+
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                return patch(await checked(request, *args, **kwargs))
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return patch(checked(request, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
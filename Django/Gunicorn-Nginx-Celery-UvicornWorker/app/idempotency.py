@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django_redis import get_redis_connection
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+POLL_INTERVAL = 0.05  # 50 ms between checks while another request holds the lock
+
+# Delete the lock only if we still own it: a request slower than the lock
+# timeout must not release the lock a duplicate request has taken since
+_RELEASE_LUA = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+def _ttl():
+    # How long a finished response is kept for replay
+    return getattr(settings, "IDEMPOTENCY_TTL", 60 * 60 * 24)
+
+
+def _lock_timeout():
+    # Safety net: the lock expires even if the worker holding it dies
+    return getattr(settings, "IDEMPOTENCY_LOCK_TIMEOUT", 30)
+
+
+def _wait_timeout():
+    # How long a concurrent duplicate waits for the first response
+    return getattr(settings, "IDEMPOTENCY_WAIT_TIMEOUT", 10)
+
+
+def _keys(request, idem_key):
+    base = f"idem:{request.path}:{idem_key}"
+    return f"{base}:lock", f"{base}:response"
+
+
+def _fingerprint(request):
+    # Same key + different body is a client bug, not a retry
+    return hashlib.sha256(request.body).hexdigest()
+
+
+def _replay(stored, fingerprint):
+    if stored["fingerprint"] != fingerprint:
+        return JsonResponse(
+            {"error": f"{IDEMPOTENCY_HEADER} was already used with a different body"},
+            status=422,
+        )
+    response = HttpResponse(
+        stored["content"],
+        status=stored["status"],
+        content_type=stored["content_type"],
+    )
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _in_progress():
+    response = JsonResponse(
+        {"error": f"A request with this {IDEMPOTENCY_HEADER} is still in progress"},
+        status=409,
+    )
+    response["Retry-After"] = "1"
+    return response
+
+
+def _store(response, response_key, fingerprint):
+    # DRF responses are rendered lazily by the handler; render now so we can keep the bytes
+    if hasattr(response, "render") and not getattr(response, "is_rendered", True):
+        response.render()
+
+    # 5xx and streaming responses are not stored: the client should be able to retry them
+    if response.streaming or response.status_code >= 500:
+        return
+
+    cache.set(
+        response_key,
+        {
+            "status": response.status_code,
+            "content": response.content,
+            "content_type": response.get("Content-Type", "application/json"),
+            "fingerprint": fingerprint,
+        },
+        timeout=_ttl(),
+    )
+
+
+def _take_lock(lock_key, token):
+    # SET NX EX on the raw connection: the token is compared as is on release
+    connection = get_redis_connection("default")
+    return connection.set(
+        cache.make_key(lock_key), token, nx=True, ex=_lock_timeout()
+    )
+
+
+def _release_lock(lock_key, token):
+    connection = get_redis_connection("default")
+    connection.eval(_RELEASE_LUA, 1, cache.make_key(lock_key), token)
+
+
+def _acquire(lock_key, response_key, fingerprint, token):
+    """
+    Returns None when this request owns the lock and must run the view,
+    otherwise the response to send back (replay / conflict).
+    """
+    deadline = time.monotonic() + _wait_timeout()
+    while True:
+        stored = cache.get(response_key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+        # SET NX → only one request wins the lock
+        if _take_lock(lock_key, token):
+            return None
+        if time.monotonic() >= deadline:
+            return _in_progress()
+        time.sleep(POLL_INTERVAL)
+
+
+async def _aacquire(lock_key, response_key, fingerprint, token):
+    deadline = time.monotonic() + _wait_timeout()
+    while True:
+        stored = await cache.aget(response_key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+        if await sync_to_async(_take_lock)(lock_key, token):
+            return None
+        if time.monotonic() >= deadline:
+            return _in_progress()
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+def idempotent(view):
+    """
+    Idempotency-Key support for POST views (sync and async).
+
+    - first request with a key: takes a Redis lock, runs the view, stores the response
+    - concurrent duplicates: wait (up to IDEMPOTENCY_WAIT_TIMEOUT) for that response
+    - later duplicates: get the stored response replayed, the view is not executed again
+
+    Requests without the header (or non-POST requests) go straight to the view.
+    """
+
+    if asyncio.iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            idem_key = request.headers.get(IDEMPOTENCY_HEADER)
+            if request.method != "POST" or not idem_key:
+                return await view(request, *args, **kwargs)
+
+            lock_key, response_key = _keys(request, idem_key)
+            fingerprint = _fingerprint(request)
+            token = uuid.uuid4().hex
+            early = await _aacquire(lock_key, response_key, fingerprint, token)
+            if early is not None:
+                return early
+
+            try:
+                response = await view(request, *args, **kwargs)
+                await sync_to_async(_store)(response, response_key, fingerprint)
+                return response
+            finally:
+                await sync_to_async(_release_lock)(lock_key, token)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        idem_key = request.headers.get(IDEMPOTENCY_HEADER)
+        if request.method != "POST" or not idem_key:
+            return view(request, *args, **kwargs)
+
+        lock_key, response_key = _keys(request, idem_key)
+        fingerprint = _fingerprint(request)
+        token = uuid.uuid4().hex
+        early = _acquire(lock_key, response_key, fingerprint, token)
+        if early is not None:
+            return early
+
+        try:
+            response = view(request, *args, **kwargs)
+            _store(response, response_key, fingerprint)
+            return response
+        finally:
+            _release_lock(lock_key, token)
+
+    return wrapper
@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 API_REQUEST_COUNT = Counter(
     "api_request_count",
@@ -23,3 +23,17 @@ CACHE_MISS = Counter(
     "Total cache misses",
     ["key"],
 )
+
+# Request coalescing (app/coalescing.py)
+# coalescing ratio = rate(role="follower") / rate(all roles)
+COALESCE_REQUESTS = Counter(
+    "coalesce_requests_total",
+    "Requests handled by the coalescing layer",
+    ["endpoint", "role"],  # role: leader | follower | timeout
+)
+
+COALESCE_INFLIGHT = Gauge(
+    "coalesce_inflight",
+    "In-flight coalesced computations",
+    ["endpoint"],
+)
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
 
@@ -19,3 +20,35 @@ class RequestLog(models.Model):
 
     def __str__(self):
         return f"{self.method} {self.path}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Transactional outbox: written in the same transaction as the business row,
+    delivered later (at-least-once) by the relay task in app/tasks.py.
+    """
+
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    # failed deliveries are retried with backoff, not before this time
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # dead letter: set after MAX_ATTEMPTS failures, the relay skips the row
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # the relay only ever scans pending rows
+            models.Index(
+                fields=["id"],
+                name="outbox_pending_idx",
+                condition=models.Q(
+                    processed_at__isnull=True, failed_at__isnull=True
+                ),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.id}"
@@ -0,0 +1,150 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from project.mongo import mongo_db
+
+from .models import Item, OutboxEvent
+from .versioning import bump_events_version
+
+TOPIC_REQUEST_EVENT = "request_event"
+TOPIC_CACHE_INVALIDATE = "cache_invalidate"
+
+# Unversioned cache keys that depend on the Item table. The items count and
+# pages embed the write version (app/versioning.py) and need no invalidation.
+ITEM_CACHE_KEYS = []
+
+# Failed deliveries: retried after RETRY_BASE_DELAY * 2**(attempts - 1) seconds
+# (capped at RETRY_MAX_DELAY), dead-lettered (failed_at) after MAX_ATTEMPTS.
+# A failing row leaves the front of the queue instead of blocking every run.
+MAX_ATTEMPTS = 10
+RETRY_BASE_DELAY = 1
+RETRY_MAX_DELAY = 15 * 60
+
+# topic -> handler(list of payloads); add new consumers with @consumer("topic")
+_CONSUMERS = {}
+
+
+def consumer(topic):
+    def decorator(fn):
+        _CONSUMERS[topic] = fn
+        return fn
+
+    return decorator
+
+
+def publish(topic, payload):
+    """
+    Add an event to the outbox.
+    Must be called inside the transaction that writes the business row.
+    """
+    return OutboxEvent.objects.create(topic=topic, payload=payload)
+
+
+def publish_item_created(item, event):
+    # Mongo request_events document + invalidation of the Item caches
+    publish(TOPIC_REQUEST_EVENT, {**event, "item_id": item.id})
+    if ITEM_CACHE_KEYS:
+        publish(TOPIC_CACHE_INVALIDATE, {"keys": ITEM_CACHE_KEYS})
+
+
+def create_item(name, value, event):
+    """
+    Create an Item and its outbox events in ONE Postgres transaction.
+    This is the only work done on the request path; Mongo and the cache
+    are updated by the relay.
+    """
+    with transaction.atomic():
+        item = Item.objects.create(name=name, value=value)
+        publish_item_created(item, event)
+    return item
+
+
+@consumer(TOPIC_REQUEST_EVENT)
+def _insert_request_events(payloads):
+    # one round trip to Mongo for the whole batch
+    try:
+        mongo_db.request_events.insert_many(payloads, ordered=False)
+    finally:
+        # also after a partial failure: some documents may be in
+        bump_events_version()
+
+
+@consumer(TOPIC_CACHE_INVALIDATE)
+def _invalidate_cache(payloads):
+    keys = {key for payload in payloads for key in payload["keys"]}
+    cache.delete_many(list(keys))
+
+
+def relay_batch(batch_size=500):
+    """
+    Deliver one batch of pending outbox events. Returns the number of events read.
+
+    Rows are locked with SKIP LOCKED, so several relays can run in parallel
+    without delivering the same event twice at the same time. Delivery is
+    at-least-once: if a consumer fails (or the topic has no consumer), the
+    rows stay pending with exponential backoff and are dead-lettered after
+    MAX_ATTEMPTS; consumers must tolerate duplicates (Mongo documents carry
+    `outbox_id` for de-duplication).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(
+                processed_at__isnull=True,
+                failed_at__isnull=True,
+                next_attempt_at__lte=now,
+            )
+            .order_by("id")[:batch_size]
+        )
+        if not events:
+            return 0
+
+        by_topic = defaultdict(list)
+        for event in events:
+            by_topic[event.topic].append(event)
+
+        delivered, failed = [], []
+        for topic, topic_events in by_topic.items():
+            handler = _CONSUMERS.get(topic)
+            ids = [e.id for e in topic_events]
+            if handler is None:
+                print(f"outbox: no consumer for topic {topic}")
+                failed += topic_events
+                continue
+            try:
+                handler([{**e.payload, "outbox_id": e.id} for e in topic_events])
+                delivered += ids
+            except Exception as exc:
+                print(f"outbox consumer {topic} failed: {exc}")
+                failed += topic_events
+
+        OutboxEvent.objects.filter(id__in=delivered).update(processed_at=now)
+        for event in failed:
+            _schedule_retry(event, now)
+        OutboxEvent.objects.bulk_update(
+            failed, ["attempts", "next_attempt_at", "failed_at"]
+        )
+
+    return len(events)
+
+
+def _schedule_retry(event, now):
+    event.attempts += 1
+    if event.attempts >= MAX_ATTEMPTS:
+        event.failed_at = now
+        print(f"outbox event {event} dead-lettered after {event.attempts} attempts")
+        return
+    delay = min(RETRY_BASE_DELAY * 2 ** (event.attempts - 1), RETRY_MAX_DELAY)
+    event.next_attempt_at = now + timedelta(seconds=delay)
+
+
+def purge_processed(older_than):
+    """Delete delivered events older than `older_than` (timedelta)."""
+    return OutboxEvent.objects.filter(
+        processed_at__lt=timezone.now() - older_than
+    ).delete()[0]
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Item
+from .versioning import bump_items_version
+
+
+# Note: queryset.update() / bulk_create() do not send these signals,
+# call bump_items_version() explicitly after them.
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def item_changed(sender, **kwargs):
+    # after commit: a reader must never cache pre-commit data under the new version
+    transaction.on_commit(bump_items_version)
@@ -0,0 +1,70 @@
+import asyncio
+import contextvars
+import threading
+
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+
+_DONE = object()
+
+
+def stream(request, produce, max_buffered_chunks=8):
+    """
+    Body iterator for StreamingHttpResponse.
+
+    `produce` is a sync generator function that yields str/bytes chunks and may
+    keep a server-side cursor open while it does (QuerySet.iterator()).
+
+    - WSGI: the generator is returned as is.
+    - ASGI: Django would consume a sync iterator completely before sending
+      anything, so the generator runs in ONE worker thread (cursor and
+      transaction stay on that thread) and hands chunks over through a bounded
+      queue. The first chunk is sent as soon as it is produced and a slow
+      client slows the producer down instead of filling memory.
+    """
+    if isinstance(request, ASGIRequest):
+        return _iterate_in_thread(produce, max_buffered_chunks)
+    return produce()
+
+
+async def _iterate_in_thread(produce, max_buffered_chunks):
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(max_buffered_chunks)
+    stopped = threading.Event()  # set when the client goes away
+
+    def put(item):
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def run():
+        try:
+            for chunk in produce():
+                if stopped.is_set():
+                    break
+                put(chunk)
+        except Exception as e:
+            if not stopped.is_set():
+                put(e)
+        finally:
+            # this thread opened its own DB connection
+            connections.close_all()
+            if not stopped.is_set():
+                put(_DONE)
+
+    # run_in_executor does not copy contextvars: without the request's context
+    # the producer would not see its primary pin (project/db_router.py) and
+    # could read from a replica right after the client's own write
+    producer = loop.run_in_executor(None, contextvars.copy_context().run, run)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+        # unblock a producer waiting on a full queue
+        while not queue.empty():
+            queue.get_nowait()
+        await producer
@@ -1,13 +1,18 @@
+import asyncio
 import time
 from datetime import datetime
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.utils import timezone
 from pymongo import MongoClient
 from celery import shared_task
 
+from project.aio import async_task
 from project.celery import prometheus_task
-from project.mongo import mongo_db
+from project.mongo import get_async_mongo_db, mongo_db
+
+from .versioning import bump_events_version
 
 # mongo_client = MongoClient(
 #     settings.MONGO_URI,
@@ -29,7 +34,55 @@ def long_task(self, payload):
     mongo_db.request_events.insert_one(
         {"type": "long_task_done", "payload": payload, "ts": timezone.now()}
     )
+    bump_events_version()
     return {
         "status": "done",
         "result": "$$$$ $$$$ $$$$ your task sleep fpr 5 seconds and then this message shown up.$$$$ $$$$ $$$$ ",
     }
+
+
+# I/O-bound version of long_task, routed to the "io" queue.
+# It runs on the persistent event loop of the worker (project/aio.py), so one
+# process waits on hundreds of these concurrently instead of one per prefork child.
+@shared_task(bind=True)
+@prometheus_task
+@async_task
+async def long_task_io(self, payload):
+    await asyncio.sleep(5)
+
+    await get_async_mongo_db().request_events.insert_one(
+        {"type": "long_task_done", "payload": payload, "ts": timezone.now()}
+    )
+    await sync_to_async(bump_events_version)()
+    return {
+        "status": "done",
+        "result": "your task waited 5 seconds on the io pool and then this message shown up.",
+    }
+
+
+# --------------------
+# Transactional outbox relay (app/outbox.py)
+# --------------------
+@shared_task
+@prometheus_task
+def relay_outbox(batch_size=500, max_batches=20):
+    # drain until the outbox is empty (bounded so one run never hogs the worker)
+    from .outbox import relay_batch
+
+    delivered = 0
+    for _ in range(max_batches):
+        count = relay_batch(batch_size)
+        delivered += count
+        if count < batch_size:
+            break
+    return delivered
+
+
+@shared_task
+@prometheus_task
+def purge_outbox(days=1):
+    from datetime import timedelta
+
+    from .outbox import purge_processed
+
+    return purge_processed(timedelta(days=days))
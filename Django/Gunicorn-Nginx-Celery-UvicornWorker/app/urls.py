@@ -13,6 +13,9 @@ urlpatterns = [
     path("json/sync-post-celery/", views.json_sync_post_with_celery),
     path("json/sync-post/", csrf_exempt(views.JsonSyncPostView.as_view())),
     path("json/sync-get-mongo-data/", views.MongoEventsView.as_view()),
+    path("json/export/", views.items_export),
+    # =======================================================
+    path("dashboard/", views.dashboard),
     # =======================================================
     path("check/", views.check),
     path("health/", views.health),
@@ -0,0 +1,53 @@
+import time
+
+from django.core.cache import cache
+
+# Incremented on every Item write (app/signals.py).
+# Cache keys / validators that embed it become stale as soon as the table changes.
+ITEMS_VERSION_KEY = "items:write_version"
+# Incremented after every insert into Mongo request_events (ETag of the events list)
+EVENTS_VERSION_KEY = "request_events:write_version"
+
+
+def _seed():
+    # Start of a new sequence: the current time in microseconds, always above
+    # any version handed out before (one +1 per write cannot outrun the clock).
+    # Restarting at 1 after Redis lost the key would make old ETags valid again.
+    return time.time_ns() // 1000
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # first reader initialises it (no-op if another process was faster)
+        seed = _seed()
+        cache.add(key, seed, timeout=None)
+        version = cache.get(key, seed)
+    return version
+
+
+def _bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # key missing (Redis flushed / evicted): start a new sequence
+        cache.add(key, _seed(), timeout=None)
+        return cache.incr(key)
+
+
+def get_items_version():
+    return _get_version(ITEMS_VERSION_KEY)
+
+
+def bump_items_version():
+    return _bump_version(ITEMS_VERSION_KEY)
+
+
+def get_events_version():
+    return _get_version(EVENTS_VERSION_KEY)
+
+
+def bump_events_version():
+    # call AFTER the insert: a reader that saw the old version may have
+    # missed the event, one that sees the new one cannot
+    return _bump_version(EVENTS_VERSION_KEY)
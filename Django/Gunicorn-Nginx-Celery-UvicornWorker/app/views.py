@@ -2,12 +2,14 @@ import asyncio
 import json
 import time
 import uuid
+from functools import wraps
 
 from asgiref.sync import async_to_sync, sync_to_async
 from django.conf import settings
 from django.core.cache import cache
-from django.http import HttpResponse, JsonResponse
-from django.shortcuts import render
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
 from django.utils.decorators import method_decorator, sync_and_async_middleware
 from django.views import View
 from django.views.decorators.cache import cache_page
@@ -20,12 +22,19 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from project.celery import MAX_PRIORITY
 from project.mongo import mongo_db
 
+from . import outbox
+from .coalescing import coalesce
+from .conditional import conditional, events_etag, items_etag
+from .idempotency import idempotent
 from .metrics import API_LATENCY, API_REQUEST_COUNT, CACHE_HIT, CACHE_MISS
 from .models import Item, RequestLog
 from .serializers import ItemSerializer, MongoEventSerializer
-from .tasks import long_task
+from .streaming import stream
+from .tasks import long_task, long_task_io
+from .versioning import bump_events_version, get_items_version
 
 BACKPRESSURE_ENABLED = getattr(settings, "BACKPRESSURE_ENABLED", False)
 BACKPRESSURE_SLEEP_20MS = getattr(settings, "BACKPRESSURE_SLEEP_20MS", 0.02)  # 20ms
@@ -41,29 +50,93 @@ async def apply_async_backpressure():
         await asyncio.sleep(BACKPRESSURE_SLEEP_20MS)
 
 
+def track_request(endpoint, event_type):
+    """
+    Per-request bookkeeping of a GET view: request count, latency and the
+    Mongo request event.
+
+    Must wrap @coalesce (not run inside the view): coalesced followers never
+    run the view but are still requests to count and record.
+
+    Usage:
+        @conditional(items_etag)
+        @track_request("json_sync_get", "sync_get")
+        @coalesce("json_sync_get")
+        def json_sync_get_view(request): ...
+    """
+
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                API_REQUEST_COUNT.labels(endpoint=endpoint, method="GET").inc()
+                with API_LATENCY.labels(endpoint=endpoint, method="GET").time():
+                    response = await view(request, *args, **kwargs)
+                await sync_to_async(mongo_db.request_events.insert_one)(
+                    {"type": event_type, "ts": time.time()}
+                )
+                await sync_to_async(bump_events_version)()
+                return response
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            API_REQUEST_COUNT.labels(endpoint=endpoint, method="GET").inc()
+            with API_LATENCY.labels(endpoint=endpoint, method="GET").time():
+                response = view(request, *args, **kwargs)
+            mongo_db.request_events.insert_one({"type": event_type, "ts": time.time()})
+            bump_events_version()
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def versioned_cache_page(timeout):
+    """
+    cache_page() whose keys embed the Item write version (app/versioning.py).
+
+    A plain cache_page keeps serving the pre-write body for `timeout` seconds
+    while items_etag already returns the new ETag: clients and nginx would
+    store the stale body under the new validator and get 304s for it until
+    the next write. With the version in the key prefix a write starts a new
+    cache entry, the old one expires unread.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key_prefix = f"items-v{get_items_version()}"
+            cached_view = cache_page(timeout, key_prefix=key_prefix)(view)
+            return cached_view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
 # --------------------
 # DRF views
 # --------------------
+@method_decorator(conditional(items_etag), name="dispatch")
+@method_decorator(track_request("drf_sync_get", "sync_get"), name="dispatch")
+@method_decorator(coalesce("drf_sync_get"), name="dispatch")
 class DRFSyncGetAPI(APIView):
-    # Per-View Cache: 15 seconds the result will be the same
-    @method_decorator(cache_page(15))
+    # Per-View Cache: 15 seconds the result will be the same (per write version)
+    @method_decorator(versioned_cache_page(15))
     def get(self, request):
-        API_REQUEST_COUNT.labels(endpoint="drf_sync_get", method="GET").inc()
-        with API_LATENCY.labels(endpoint="drf_sync_get", method="GET").time():
-            t0 = time.time()
-            count = Item.objects.count()
-            mongo_db.request_events.insert_one(
-                {
-                    "type": "sync_get",
-                    "ts": time.time(),
-                }
-            )
-
-            return Response(
-                {"items_count": count, "duration_ms": (time.time() - t0) * 1000}
-            )
+        t0 = time.time()
+        count = Item.objects.count()
+        return Response(
+            {"items_count": count, "duration_ms": (time.time() - t0) * 1000}
+        )
 
 
+# dispatch is decorated (not post) so the stored response is the finalized DRF response
+@method_decorator(idempotent, name="dispatch")
 class DRFSyncPostAPI(APIView):
 
     @extend_schema(
@@ -75,11 +148,13 @@ class DRFSyncPostAPI(APIView):
 
         serializer = ItemSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        item = serializer.save()
 
-        mongo_db.request_events.insert_one(
-            {"type": "sync_post", "name": item.name, "ts": time.time()}
-        )
+        # Item row + outbox events in one transaction, Mongo is written by the relay
+        with transaction.atomic():
+            item = serializer.save()
+            outbox.publish_item_created(
+                item, {"type": "sync_post", "name": item.name, "ts": time.time()}
+            )
 
         return Response(
             {
@@ -94,24 +169,23 @@ class DRFSyncPostAPI(APIView):
 # JSon endpoints
 # --------------------
 @require_GET
+@conditional(items_etag)
+@track_request("json_sync_get", "sync_get")
+@coalesce("json_sync_get")
 def json_sync_get_view(request):
+    apply_sync_backpressure()  # 🔥 Backpressure
 
-    API_REQUEST_COUNT.labels(endpoint="json_sync_get", method="GET").inc()
-    with API_LATENCY.labels(endpoint="json_sync_get", method="GET").time():
-        apply_sync_backpressure()  # 🔥 Backpressure
-
-        t0 = time.time()
-        count = Item.objects.count()
-
-        mongo_db.request_events.insert_one({"type": "sync_get", "ts": time.time()})
+    t0 = time.time()
+    count = Item.objects.count()
 
-        duration = (time.time() - t0) * 1000
-        return JsonResponse({"items_count": count, "duration_ms": duration})
+    duration = (time.time() - t0) * 1000
+    return JsonResponse({"items_count": count, "duration_ms": duration})
 
 
 class JsonSyncPostView(View):
 
     @method_decorator(csrf_exempt)
+    @method_decorator(idempotent)
     def dispatch(self, request, *args, **kwargs):
         return super().dispatch(request, *args, **kwargs)
 
@@ -135,15 +209,15 @@ class JsonSyncPostView(View):
             # Form mode (x-www-form-urlencoded or multipart/form-data)
             name = request.POST.get("name", "no-name")
 
-        # --- Save item ---
-        item = Item.objects.create(name=name, value=1)
-
-        mongo_db.request_events.insert_one(
+        # --- Save item (+ outbox events, same transaction) ---
+        item = outbox.create_item(
+            name,
+            1,
             {
                 "type": "sync_post",
                 "name": name,
                 "ts": time.time(),
-            }
+            },
         )
 
         duration = (time.time() - t0) * 1000
@@ -151,39 +225,41 @@ class JsonSyncPostView(View):
         return JsonResponse({"id": item.id, "duration_ms": duration})
 
 
+@conditional(items_etag)
+@track_request("json_async_get", "async_get")
+@coalesce("json_async_get")
 async def json_async_get_view(request):
     t0 = time.time()
 
-    cache_key = "items_count_v1"
+    # Same write version as the ETag (items_etag): after a write the new ETag
+    # can only tag a count read after that write, never the previous entry
+    cache_key = f"items_count:v{get_items_version()}"
 
     # Low-Level Cache (cache.get / cache.set)
     cached_count = cache.get(cache_key)
     if cached_count is None:
 
         # adding prometheus metric
-        CACHE_MISS.labels(key=cache_key).inc()
+        CACHE_MISS.labels(key="items_count").inc()
         # cache miss
         count = await sync_to_async(Item.objects.count)()
         # If we use redis library directly belew line will be: redis_client.set("a", "b", ex=30)
         cache.set(cache_key, count, timeout=30)  # 30 seconds
     else:
         # adding prometheus metric
-        CACHE_HIT.labels(key=cache_key).inc()
+        CACHE_HIT.labels(key="items_count").inc()
         # cache hit
         count = cached_count
 
     # instead of below line we use caching to store count
     # count = await sync_to_async(Item.objects.count)()
 
-    await sync_to_async(mongo_db.request_events.insert_one)(
-        {"type": "async_get", "ts": time.time()}
-    )
-
     duration = (time.time() - t0) * 1000
     return JsonResponse({"items_count": count, "duration_ms": duration})
 
 
 @csrf_exempt
+@idempotent
 async def json_async_post_view(request):
 
     await apply_async_backpressure()  # 🔥 Backpressure
@@ -194,10 +270,8 @@ async def json_async_post_view(request):
 
     name = body.get("name", "no-name")
 
-    item = await sync_to_async(Item.objects.create)(name=name, value=2)
-
-    await sync_to_async(mongo_db.request_events.insert_one)(
-        {"type": "async_post", "name": name, "ts": time.time()}
+    item = await sync_to_async(outbox.create_item)(
+        name, 2, {"type": "async_post", "name": name, "ts": time.time()}
     )
 
     duration = (time.time() - t0) * 1000
@@ -207,9 +281,21 @@ async def json_async_post_view(request):
 # Sync POST - enqueue to celery (non-blocking)
 @require_POST
 @csrf_exempt
+@idempotent
 def json_sync_post_with_celery(request):
-    payload = json.loads(request.body or "{}")
-    task = long_task.delay(payload)
+    try:
+        payload = json.loads(request.body or "{}")
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    # ?priority=0..10 → RabbitMQ priority inside the "slow" queue (default 5)
+    try:
+        priority = int(request.GET.get("priority", 5))
+    except ValueError:
+        return JsonResponse({"error": "priority must be an integer"}, status=400)
+    priority = min(max(priority, 0), MAX_PRIORITY)
+    # ?mode=io → async version executed on the I/O-bound worker pool
+    task_fn = long_task_io if request.GET.get("mode") == "io" else long_task
+    task = task_fn.apply_async(args=(payload,), priority=priority)
     # Invalidate relevant caches if needed
     # cache.delete_pattern("some_cache_prefix*")
     return JsonResponse(
@@ -222,6 +308,7 @@ def json_sync_post_with_celery(request):
     )
 
 
+@method_decorator(conditional(events_etag), name="dispatch")
 class MongoEventsView(View):
     def get(self, request):
         start = time.time()
@@ -266,11 +353,113 @@ def health(request):
 # --------------------
 
 
+DASHBOARD_PAGE_SIZE = getattr(settings, "DASHBOARD_PAGE_SIZE", 1000)
+DASHBOARD_CHUNK_SIZE = getattr(settings, "DASHBOARD_CHUNK_SIZE", 200)
+DASHBOARD_FRAGMENT_TTL = 60 * 10  # writes invalidate through the version, TTL only frees memory
+
+
 def dashboard(request):
-    items = Item.objects.all()
-    now = time.time()
-    return render(request, "dashboard.html", {"items": items, "now": now})
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+
+    # Fragment key embeds the Item write version → a write invalidates every page at once
+    cache_key = (
+        f"dashboard:items:v{get_items_version()}:page={page}:size={DASHBOARD_PAGE_SIZE}"
+    )
+
+    def render_rows(items):
+        return render_to_string("app/dashboard_rows.html", {"items": items})
+
+    def produce():
+        context = {"page": page, "page_size": DASHBOARD_PAGE_SIZE}
+        yield render_to_string("app/dashboard_head.html", context)
+
+        fragment = cache.get(cache_key)
+        if fragment is None:
+            rows, has_next = [], False
+            offset = (page - 1) * DASHBOARD_PAGE_SIZE
+            # one extra row tells whether a next page exists
+            queryset = Item.objects.order_by("id").only("id", "name")[
+                offset : offset + DASHBOARD_PAGE_SIZE + 1
+            ]
+
+            # server-side cursors need a transaction behind PgBouncer (transaction
+            # pooling), opened on the alias the router picked (primary or replica)
+            with transaction.atomic(using=queryset.db):
+                chunk, seen = [], 0
+                for item in queryset.iterator(chunk_size=DASHBOARD_CHUNK_SIZE):
+                    seen += 1
+                    if seen > DASHBOARD_PAGE_SIZE:
+                        has_next = True
+                        break
+                    chunk.append(item)
+                    if len(chunk) == DASHBOARD_CHUNK_SIZE:
+                        html = render_rows(chunk)
+                        rows.append(html)
+                        yield html
+                        chunk = []
+                if chunk:
+                    html = render_rows(chunk)
+                    rows.append(html)
+                    yield html
+
+            fragment = {"html": "".join(rows), "has_next": has_next}
+            cache.set(cache_key, fragment, timeout=DASHBOARD_FRAGMENT_TTL)
+        else:
+            yield fragment["html"]
+
+        yield render_to_string(
+            "app/dashboard_foot.html",
+            {**context, "has_next": fragment["has_next"], "now": time.time()},
+        )
+
+    return StreamingHttpResponse(stream(request, produce), content_type="text/html")
+
+
+EXPORT_CHUNK_SIZE = getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+
+
+def items_export(request):
+    """
+    Every Item as NDJSON (default) or as one JSON array (?format=json).
+
+    Rows come from a server-side cursor (.iterator) and are sent as soon as a
+    chunk is fetched: memory stays flat whatever the table size and the first
+    byte does not wait for the last row.
+    """
+    fmt = request.GET.get("format", "ndjson")
+    if fmt not in ("ndjson", "json"):
+        return JsonResponse({"error": "format must be ndjson or json"}, status=400)
+
+    def produce():
+        queryset = Item.objects.order_by("id").values("id", "name", "value")
+        if fmt == "json":
+            yield "["
+        # same transaction requirement as the dashboard (PgBouncer, router alias)
+        with transaction.atomic(using=queryset.db):
+            rows, first = [], True
+            for row in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+                rows.append(json.dumps(row, separators=(",", ":")))
+                if len(rows) == EXPORT_CHUNK_SIZE:
+                    yield render_export_chunk(rows, fmt, first)
+                    rows, first = [], False
+            if rows:
+                yield render_export_chunk(rows, fmt, first)
+        if fmt == "json":
+            yield "]"
+
+    content_type = "application/x-ndjson" if fmt == "ndjson" else "application/json"
+    response = StreamingHttpResponse(stream(request, produce), content_type=content_type)
+    response["X-Accel-Buffering"] = "no"  # nginx: pass chunks through as they come
+    return response
+
 
+def render_export_chunk(rows, fmt, first):
+    if fmt == "ndjson":
+        return "\n".join(rows) + "\n"
+    return ("" if first else ",") + ",".join(rows)
 
 # --------------------
 # Not works properly
@@ -306,6 +495,7 @@ async def drf_async_post_view(request):
             "duration_ms": (time.time() - start) * 1000,
         }
     )
+    await sync_to_async(bump_events_version)()
 
     return Response(
         {
@@ -331,6 +521,7 @@ class AsyncPostAPI(APIView):
         await sync_to_async(mongo_db.request_events.insert_one)(
             {"type": "async_post", "name": item.name, "ts": time.time()}
         )
+        await sync_to_async(bump_events_version)()
 
         return Response(
             {
@@ -0,0 +1,47 @@
+"""
+Prefork pool vs I/O-bound pool for the 5-second long_task.
+
+Run inside the worker/web container while the workers are up:
+
+    python -m benchmarks.celery_pools --tasks 200
+
+It enqueues the same number of long_task (slow queue, prefork) and long_task_io
+(io queue, persistent event loop) jobs and reports the wall time until all
+results are back and the resulting tasks/second.
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from app.tasks import long_task, long_task_io  # noqa: E402
+
+
+def run(task, count, timeout):
+    start = time.perf_counter()
+    results = [task.delay({"bench": i}) for i in range(count)]
+    for result in results:
+        result.get(timeout=timeout)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--timeout", type=int, default=600)
+    args = parser.parse_args()
+
+    print(f"{'pool':<22}{'tasks':>8}{'seconds':>12}{'tasks/s':>12}")
+    for label, task in (("prefork (slow)", long_task), ("io (event loop)", long_task_io)):
+        elapsed = run(task, args.tasks, args.timeout)
+        print(f"{label:<22}{args.tasks:>8}{elapsed:>12.2f}{args.tasks / elapsed:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Persistent event loop per worker process for I/O-bound Celery tasks.
+
+Instead of creating an event loop (and new DB/Mongo clients) for every task,
+each worker process runs one loop in a background thread. Tasks submit their
+coroutine to it, so with the "threads" (or gevent) pool hundreds of tasks wait
+on I/O concurrently in one process while sharing the same clients.
+
+    @shared_task(bind=True)
+    @async_task
+    async def my_task(self, payload):
+        await asyncio.sleep(1)
+"""
+
+import asyncio
+import os
+import threading
+from functools import wraps
+
+_LOOP = None
+_LOOP_PID = None
+_LOCK = threading.Lock()
+
+
+def get_loop():
+    """Return the loop of this process, starting it on first use (fork-safe)."""
+    global _LOOP, _LOOP_PID
+
+    with _LOCK:
+        # after a fork the parent's loop thread does not exist in the child
+        if _LOOP is None or _LOOP_PID != os.getpid():
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="celery-aio-loop", daemon=True
+            ).start()
+            _LOOP, _LOOP_PID = loop, os.getpid()
+        return _LOOP
+
+
+def run_async(coro, timeout=None):
+    """Run a coroutine on the persistent loop and block the calling thread for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result(timeout)
+
+
+def async_task(fn):
+    """Let a Celery task be written as `async def`."""
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        return run_async(fn(*args, **kwargs))
+
+    return wrapper
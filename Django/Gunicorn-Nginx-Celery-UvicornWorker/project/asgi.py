@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project.settings")
 
 application = get_asgi_application()
+
+# Web processes only: poll PgBouncer SHOW POOLS / SHOW STATS in the background
+from project.pgbouncer_stats import start_collector  # noqa: E402
+
+start_collector()
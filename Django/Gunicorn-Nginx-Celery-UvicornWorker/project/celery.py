@@ -1,8 +1,11 @@
+import os
 import time
 from functools import wraps
 
 from celery import Celery
-from prometheus_client import Counter, Histogram
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from kombu import Exchange, Queue
+from prometheus_client import Counter, Gauge, Histogram
 
 CELERY_TASKS_TOTAL = Counter(
     "celery_tasks_total", "Total number of Celery tasks", ["task_name", "status"]
@@ -10,12 +13,119 @@ CELERY_TASKS_TOTAL = Counter(
 CELERY_TASKS_TIME = Histogram(
     "celery_tasks_duration_seconds", "Time spent in Celery tasks", ["task_name"]
 )
+CELERY_QUEUE_DEPTH = Gauge(
+    "celery_queue_depth",
+    "Messages waiting in the broker queue",
+    ["queue"],
+    multiprocess_mode="max",
+)
+CELERY_QUEUE_WAIT = Histogram(
+    "celery_queue_wait_seconds",
+    "Time between publish and start of execution",
+    ["queue"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
 
 app = Celery("project")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
 
 
+# --------------------
+# Queues & routing
+# --------------------
+# Each queue is consumed by its own worker pool (see project/worker.py), so a burst
+# of slow tasks can only saturate the "slow" pool and never starves "fast" tasks.
+#   fast → short tasks, high prefetch, ack on receive
+#   slow → long-running tasks (long_task), prefetch 1, ack after execution
+#   bulk → batch / maintenance jobs, prefetch 1, ack after execution
+#   io   → I/O-bound async tasks (long_task_io), hundreds in flight per process
+MAX_PRIORITY = 10
+
+WORKER_POOLS = {
+    "fast": {
+        "pool": "prefork",
+        "concurrency": 8,
+        "prefetch_multiplier": 4,
+        "acks_late": False,
+    },
+    "slow": {
+        "pool": "prefork",
+        "concurrency": 4,
+        "prefetch_multiplier": 1,
+        "acks_late": True,
+    },
+    "bulk": {
+        "pool": "prefork",
+        "concurrency": 2,
+        "prefetch_multiplier": 1,
+        "acks_late": True,
+    },
+    # "threads" needs no extra dependency; "gevent" is also supported (pip install gevent)
+    "io": {
+        "pool": os.getenv("CELERY_IO_POOL", "threads"),
+        "concurrency": int(os.getenv("CELERY_IO_CONCURRENCY", "200")),
+        "prefetch_multiplier": 4,
+        "acks_late": True,
+    },
+}
+
+app.conf.task_queues = [
+    Queue(
+        name,
+        Exchange(name, type="direct"),
+        routing_key=name,
+        # RabbitMQ priority queue: messages with higher priority are delivered first
+        queue_arguments={"x-max-priority": MAX_PRIORITY},
+    )
+    for name in WORKER_POOLS
+]
+app.conf.task_default_queue = "fast"
+app.conf.task_default_exchange = "fast"
+app.conf.task_default_routing_key = "fast"
+app.conf.task_default_priority = 5
+app.conf.task_routes = {
+    "app.tasks.long_task": {"queue": "slow"},
+    "app.tasks.long_task_io": {"queue": "io"},
+}
+
+
+@before_task_publish.connect
+def stamp_enqueue_time(headers=None, **kwargs):
+    # read back in task_prerun to measure time spent waiting in the queue
+    if headers is not None:
+        headers["enqueued_at"] = time.time()
+
+
+@task_prerun.connect
+def observe_queue_wait(task=None, **kwargs):
+    request = task.request
+    enqueued_at = getattr(request, "enqueued_at", None) or (
+        request.headers or {}
+    ).get("enqueued_at")
+    if enqueued_at is None:
+        return
+    queue = (request.delivery_info or {}).get("routing_key") or "unknown"
+    CELERY_QUEUE_WAIT.labels(queue=queue).observe(max(0.0, time.time() - enqueued_at))
+
+
+@task_prerun.connect
+@task_postrun.connect
+def reset_primary_pin(**kwargs):
+    # A worker process runs many tasks: a write in one task pins reads to the
+    # primary for that task only (project/db_router.py), not for the next ones.
+    # Outside a request the pin would otherwise never be reset.
+    from project import db_router
+
+    db_router.begin_request(pinned=False)
+
+
+def queue_depth(name):
+    """Number of ready messages in a broker queue (passive declare, no side effects)."""
+    with app.connection_for_read() as conn:
+        return conn.default_channel.queue_declare(queue=name, passive=True).message_count
+
+
 # wrapper for tasks
 def prometheus_task(fn):
 
@@ -0,0 +1,25 @@
+import time
+
+from django.db.backends.postgresql import base
+
+from project.metrics import DB_CONNECTION_ACQUIRE
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend that measures how long it takes to get a connection.
+
+    With CONN_MAX_AGE = 0 every request opens a new client connection to
+    PgBouncer, so this is the per-request connection-acquire latency. When
+    PgBouncer has no free server connection the wait shows up here (and in
+    pgbouncer_pool{column="cl_waiting"}), not in the query time.
+    """
+
+    def get_new_connection(self, conn_params):
+        start = time.perf_counter()
+        try:
+            return super().get_new_connection(conn_params)
+        finally:
+            DB_CONNECTION_ACQUIRE.labels(alias=self.alias).observe(
+                time.perf_counter() - start
+            )
@@ -0,0 +1,135 @@
+import contextvars
+import random
+import threading
+import time
+
+import psycopg2
+from django.conf import settings
+
+from project.metrics import REPLICA_HEALTHY, REPLICA_LAG
+
+PRIMARY = "default"
+
+# 0 → 0s when the replica replayed everything it received, otherwise age of the
+# last replayed transaction (an idle primary does not look like a lagging replica)
+LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+# Set by ReadYourWritesMiddleware (cookie) or by a write in the current request;
+# reset per request by the middleware and per Celery task (project/celery.py)
+_pinned_to_primary = contextvars.ContextVar("pinned_to_primary", default=False)
+_wrote = contextvars.ContextVar("wrote_to_primary", default=False)
+
+# alias -> {"healthy": bool, "lag": float, "checked_at": float}
+_HEALTH = {}
+_CHECKING = set()
+_LOCK = threading.Lock()
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica_")]
+
+
+def pin_to_primary():
+    """Send every following read of this request/context to the primary."""
+    _pinned_to_primary.set(True)
+
+
+def begin_request(pinned):
+    _pinned_to_primary.set(pinned)
+    _wrote.set(False)
+
+
+def wrote_to_primary():
+    return _wrote.get()
+
+
+def _measure_lag(alias):
+    db = settings.DATABASES[alias]
+    conn = psycopg2.connect(
+        host=db["HOST"],
+        port=db["PORT"],
+        user=db["USER"],
+        password=db["PASSWORD"],
+        dbname=db["NAME"],
+        connect_timeout=2,
+    )
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            return float(cursor.fetchone()[0])
+    finally:
+        conn.close()
+
+
+def _check(alias):
+    try:
+        lag = _measure_lag(alias)
+        healthy = lag <= getattr(settings, "REPLICA_MAX_LAG_SECONDS", 5)
+    except Exception as e:
+        print(f"replica {alias} health check failed: {e}")
+        lag, healthy = float("inf"), False
+
+    REPLICA_LAG.labels(alias=alias).set(lag)
+    REPLICA_HEALTHY.labels(alias=alias).set(1 if healthy else 0)
+    with _LOCK:
+        _HEALTH[alias] = {"healthy": healthy, "lag": lag, "checked_at": time.monotonic()}
+        _CHECKING.discard(alias)
+
+
+def is_healthy(alias):
+    """
+    Cached health of a replica. When the result is older than
+    REPLICA_HEALTH_CHECK_INTERVAL, one request re-checks it while the others
+    keep using the previous result (an unknown replica counts as unhealthy).
+    """
+    interval = getattr(settings, "REPLICA_HEALTH_CHECK_INTERVAL", 5)
+    with _LOCK:
+        state = _HEALTH.get(alias)
+        stale = state is None or time.monotonic() - state["checked_at"] > interval
+        should_check = stale and alias not in _CHECKING
+        if should_check:
+            _CHECKING.add(alias)
+
+    if should_check:
+        if state is None:
+            _check(alias)  # first check is synchronous
+        else:
+            threading.Thread(target=_check, args=(alias,), daemon=True).start()
+
+    with _LOCK:
+        return _HEALTH.get(alias, {}).get("healthy", False)
+
+
+class PrimaryReplicaRouter:
+    """
+    Reads → a healthy replica (random), writes → the primary.
+
+    Falls back to the primary when no replica is configured, all replicas lag
+    more than REPLICA_MAX_LAG_SECONDS or fail their health check, or the
+    client wrote recently (read-your-writes window, see ReadYourWritesMiddleware).
+    """
+
+    def db_for_read(self, model, **hints):
+        if _pinned_to_primary.get():
+            return PRIMARY
+        healthy = [alias for alias in replica_aliases() if is_healthy(alias)]
+        return random.choice(healthy) if healthy else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        # the rest of this request (and the client's next requests) read from the primary
+        _pinned_to_primary.set(True)
+        _wrote.set(True)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
@@ -0,0 +1,61 @@
+from prometheus_client import Gauge, Histogram
+
+# --------------------
+# Django DB connections (project/db_backend, project/middleware/db_timing.py)
+# --------------------
+DB_CONNECTION_ACQUIRE = Histogram(
+    "db_connection_acquire_seconds",
+    "Time to open a DB connection (connect to PgBouncer + auth)",
+    ["alias"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+DB_REQUEST_QUERY_TIME = Histogram(
+    "db_request_query_seconds",
+    "Total time spent executing SQL per request",
+    ["alias"],
+)
+
+DB_REQUEST_QUERIES = Histogram(
+    "db_request_queries",
+    "Number of SQL statements per request",
+    ["alias"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
+
+# --------------------
+# PgBouncer admin console (project/pgbouncer_stats.py)
+# --------------------
+# SHOW POOLS → one series per (database, user)
+PGBOUNCER_POOL = Gauge(
+    "pgbouncer_pool",
+    "PgBouncer SHOW POOLS columns (cl_active, cl_waiting, sv_active, sv_idle, ...)",
+    ["database", "user", "column"],
+)
+
+# SHOW STATS → one series per database
+PGBOUNCER_STATS = Gauge(
+    "pgbouncer_stats",
+    "PgBouncer SHOW STATS columns (avg_query_time, avg_wait_time, total_xact_count, ...)",
+    ["database", "column"],
+)
+
+PGBOUNCER_UP = Gauge(
+    "pgbouncer_up",
+    "1 if the last poll of the PgBouncer admin console succeeded",
+)
+
+# --------------------
+# Read replicas (project/db_router.py)
+# --------------------
+REPLICA_LAG = Gauge(
+    "db_replica_lag_seconds",
+    "Replication lag measured by the last health check",
+    ["alias"],
+)
+
+REPLICA_HEALTHY = Gauge(
+    "db_replica_healthy",
+    "1 if the replica is used for reads, 0 if reads fall back to the primary",
+    ["alias"],
+)
@@ -0,0 +1,50 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from project.metrics import DB_REQUEST_QUERIES, DB_REQUEST_QUERY_TIME
+
+
+class _QueryTimer:
+    """execute_wrapper that sums SQL time and statement count for one alias."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+class DBTimingMiddleware:
+    """
+    Per-request SQL time and statement count, per DB alias.
+
+    Together with db_connection_acquire_seconds (project/db_backend) it tells
+    whether a slow request waited for a connection (pool starvation) or spent
+    its time in queries.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timers = {alias: _QueryTimer() for alias in connections}
+
+        with ExitStack() as stack:
+            for alias, timer in timers.items():
+                stack.enter_context(connections[alias].execute_wrapper(timer))
+            response = self.get_response(request)
+
+        for alias, timer in timers.items():
+            if timer.count:
+                DB_REQUEST_QUERY_TIME.labels(alias=alias).observe(timer.seconds)
+                DB_REQUEST_QUERIES.labels(alias=alias).observe(timer.count)
+
+        return response
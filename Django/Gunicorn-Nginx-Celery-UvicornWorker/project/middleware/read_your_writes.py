@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+
+from project import db_router
+
+COOKIE_NAME = "db_pin"
+
+
+def get_window():
+    """
+    Seconds a client keeps reading from the primary after a write.
+    Example in settings.py:
+        READ_YOUR_WRITES_SECONDS = 5
+    """
+    return getattr(settings, "READ_YOUR_WRITES_SECONDS", 5)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pins a client to the primary for a short window after it wrote.
+    The window is carried in a cookie, so it works across workers and replicas
+    of the web service without server-side session storage.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            pinned_until = float(request.COOKIES.get(COOKIE_NAME, 0))
+        except ValueError:
+            pinned_until = 0
+
+        db_router.begin_request(pinned=pinned_until > time.time())
+        response = self.get_response(request)
+
+        if db_router.wrote_to_primary():
+            window = get_window()
+            response.set_cookie(
+                COOKIE_NAME,
+                str(time.time() + window),
+                max_age=window,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -6,3 +6,22 @@ MONGO_DB = os.environ.get("MONGO_DB", "analytics")
 
 client = MongoClient(MONGO_URL)
 mongo_db = client[MONGO_DB]
+
+
+_async_client = None
+_async_client_pid = None
+
+
+def get_async_mongo_db():
+    """
+    Motor database shared by all async tasks of a worker process.
+    Must only be used from the persistent loop (project/aio.py).
+    """
+    global _async_client, _async_client_pid
+
+    if _async_client is None or _async_client_pid != os.getpid():
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        _async_client = AsyncIOMotorClient(MONGO_URL, maxPoolSize=100)
+        _async_client_pid = os.getpid()
+    return _async_client[MONGO_DB]
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import psycopg2
+from django.conf import settings
+
+from project.metrics import PGBOUNCER_POOL, PGBOUNCER_STATS, PGBOUNCER_UP
+
+_STARTED = False
+_LOCK = threading.Lock()
+
+
+def get_interval():
+    """
+    Seconds between two polls of the admin console.
+    Example in settings.py:
+        PGBOUNCER_STATS_INTERVAL = 15
+    """
+    return getattr(settings, "PGBOUNCER_STATS_INTERVAL", 15)
+
+
+def _rows(cursor, command):
+    cursor.execute(command)
+    columns = [c.name for c in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def poll_once():
+    """Query SHOW POOLS / SHOW STATS once and update the Prometheus gauges."""
+    db = settings.DATABASES["default"]
+    conn = psycopg2.connect(
+        host=db["HOST"],
+        port=db["PORT"],
+        user=db["USER"],
+        password=db["PASSWORD"],
+        dbname="pgbouncer",  # the admin console is a virtual database
+        connect_timeout=3,
+    )
+    # The admin console does not support transactions
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cursor:
+            for row in _rows(cursor, "SHOW POOLS"):
+                for column, value in row.items():
+                    if _is_number(value):
+                        PGBOUNCER_POOL.labels(
+                            database=row["database"], user=row["user"], column=column
+                        ).set(value)
+
+            for row in _rows(cursor, "SHOW STATS"):
+                for column, value in row.items():
+                    if _is_number(value):
+                        PGBOUNCER_STATS.labels(
+                            database=row["database"], column=column
+                        ).set(value)
+    finally:
+        conn.close()
+
+
+def _run():
+    while True:
+        try:
+            poll_once()
+            PGBOUNCER_UP.set(1)
+        except Exception as e:
+            PGBOUNCER_UP.set(0)
+            print(f"pgbouncer stats poll failed: {e}")
+        time.sleep(get_interval())
+
+
+def start_collector():
+    """Start the background poller once per process (no-op when disabled)."""
+    global _STARTED
+
+    if not getattr(settings, "PGBOUNCER_STATS_ENABLED", False):
+        return
+    with _LOCK:
+        if _STARTED:
+            return
+        threading.Thread(target=_run, name="pgbouncer-stats", daemon=True).start()
+        _STARTED = True
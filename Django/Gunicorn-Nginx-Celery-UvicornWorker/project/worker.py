@@ -0,0 +1,105 @@
+"""
+Worker entry point: one Celery pool per queue.
+
+    python -m project.worker slow              # a single pool consuming "slow"
+    python -m project.worker fast slow bulk io # one child process (pool) per queue
+
+Pool type, concurrency, prefetch multiplier and acks_late come from
+WORKER_POOLS in project/celery.py. Every pool exposes its Prometheus metrics
+(queue depth, queue wait time, task counters) on METRICS_PORT + index of the queue.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+QUEUE_DEPTH_INTERVAL = 5  # seconds between broker polls
+METRICS_PORT = int(os.getenv("CELERY_METRICS_PORT", "5555"))
+
+
+def _prepare_multiprocess_dir(queue):
+    # prefork children write their metrics to files, the pool parent serves them.
+    # Must be set before prometheus_client is imported.
+    path = os.path.join(os.getenv("PROMETHEUS_MULTIPROC_BASE", "/tmp/prometheus"), queue)
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+
+
+def _poll_queue_depth(queue):
+    from project.celery import CELERY_QUEUE_DEPTH, queue_depth
+
+    while True:
+        try:
+            CELERY_QUEUE_DEPTH.labels(queue=queue).set(queue_depth(queue))
+        except Exception as e:
+            print(f"queue depth poll failed for {queue}: {e}")
+        time.sleep(QUEUE_DEPTH_INTERVAL)
+
+
+def run_pool(queue, port):
+    _prepare_multiprocess_dir(queue)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project.settings")
+
+    if queue == "io" and os.getenv("CELERY_IO_POOL") in ("gevent", "eventlet"):
+        # green pools must monkey-patch the stdlib before anything else is imported
+        from celery import maybe_patch_concurrency
+
+        maybe_patch_concurrency(["-P", os.environ["CELERY_IO_POOL"]])
+
+    from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+
+    from project.celery import WORKER_POOLS, app
+
+    options = WORKER_POOLS[queue]
+
+    # Task options are read when tasks are bound → set them before the worker starts
+    app.conf.worker_prefetch_multiplier = options["prefetch_multiplier"]
+    app.conf.task_acks_late = options["acks_late"]
+    app.conf.task_reject_on_worker_lost = options["acks_late"]
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    start_http_server(port, registry=registry)
+
+    threading.Thread(target=_poll_queue_depth, args=(queue,), daemon=True).start()
+
+    app.worker_main(
+        [
+            "worker",
+            "--loglevel=info",
+            f"--queues={queue}",
+            f"--hostname={queue}@%h",
+            f"--pool={options['pool']}",
+            f"--concurrency={options['concurrency']}",
+            f"--prefetch-multiplier={options['prefetch_multiplier']}",
+        ]
+    )
+
+
+def main(queues):
+    if len(queues) == 1:
+        run_pool(queues[0], METRICS_PORT)
+        return
+
+    # One OS process per pool: a stuck pool cannot block the others
+    children = []
+    for index, queue in enumerate(queues):
+        env = dict(os.environ, CELERY_METRICS_PORT=str(METRICS_PORT + index))
+        children.append(
+            subprocess.Popen([sys.executable, "-m", "project.worker", queue], env=env)
+        )
+
+    try:
+        for child in children:
+            child.wait()
+    finally:
+        for child in children:
+            child.terminate()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or ["fast", "slow", "bulk", "io"])
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project.settings")
 
 application = get_wsgi_application()
+
+# Web processes only: poll PgBouncer SHOW POOLS / SHOW STATS in the background
+from project.pgbouncer_stats import start_collector  # noqa: E402
+
+start_collector()
@@ -1,12 +1,202 @@
 import json
+import os
+
 import redis.asyncio as redis
 
-REDIS_URL = "redis://redis:6379"
+from .local_cache import MISS, PUBSUB_CHANNEL, LocalCache
+from .metrics import (
+    CACHE_HIT,
+    CACHE_MISS,
+    REDIS_POOL_IN_USE,
+    REDIS_POOL_MAX,
+    REDIS_POOL_OPEN,
+)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_POOL_TIMEOUT = int(os.getenv("REDIS_POOL_TIMEOUT", "5"))  # wait for a free connection
+
+# Value encoding: "json" (default) or "msgpack" (pip install msgpack)
+CACHE_CODEC = os.getenv("CACHE_CODEC", "json")
+# zstd-compress values bigger than this many bytes, 0 = never (pip install zstandard)
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "0"))
+# After an insert: "invalidate" (bump the namespace) or "write_through"
+# (append the new items to the cached pages, see append_to_pages)
+CACHE_WRITE_MODE = os.getenv("CACHE_WRITE_MODE", "invalidate")
+PAGE_LOAD_MARK_MS = 10_000  # a page being loaded blocks write-through at most this long
+
+# In-process cache of hot keys in the API workers: "off", "tracking" (Redis >= 6,
+# CLIENT TRACKING) or "pubsub" (writers publish invalidations; set it for the
+# Celery workers too). See app/local_cache.py.
+LOCAL_CACHE_MODE = os.getenv("LOCAL_CACHE_MODE", "off")
+local_cache = LocalCache(
+    REDIS_URL,
+    LOCAL_CACHE_MODE,
+    prefixes=("ns:", "items:", "item:"),
+    max_entries=int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "1000")),
+    max_age=float(os.getenv("LOCAL_CACHE_MAX_AGE", "30")),
+)
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+if CACHE_CODEC == "msgpack" and msgpack is None:
+    print("⚠️ CACHE_CODEC=msgpack but msgpack is not installed, using json")
+    CACHE_CODEC = "json"
+if CACHE_COMPRESS_MIN_BYTES and zstandard is None:
+    print("⚠️ CACHE_COMPRESS_MIN_BYTES is set but zstandard is not installed")
+    CACHE_COMPRESS_MIN_BYTES = 0
+
+# 1-byte header in front of every stored value, so readers can decode values
+# written with another codec (e.g. during a rolling deploy that changes CACHE_CODEC)
+_JSON, _MSGPACK, _ZSTD = b"j", b"m", b"z"
+
+# One pool (and client) per process, created in the FastAPI lifespan
+_pool = None
+_client = None
+_pid = None
+
+
+def count_lookup(cache: str, key: str, hit: bool):
+    """
+    Hit/miss counters of app/metrics.py.
+
+    Example:
+      count_lookup("redis", "items:v7:list:limit=100:after=0", False)
+      → cache_miss_total{cache="redis", keyspace="items"} += 1
+    """
+    counter = CACHE_HIT if hit else CACHE_MISS
+    counter.labels(cache=cache, keyspace=key.split(":", 1)[0]).inc()
+
+
+class InstrumentedPool(redis.BlockingConnectionPool):
+    """BlockingConnectionPool counting its connections (app/metrics.py, pool_stats)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # handed out by get_connection: the base class also release()s a
+        # connection it failed to connect (Redis down) and never handed out
+        self._counted = set()
+        self.created = 0
+        REDIS_POOL_MAX.set(self.max_connections)
+
+    @property
+    def in_use(self) -> int:
+        return len(self._counted)
+
+    def make_connection(self):
+        self.created += 1
+        REDIS_POOL_OPEN.set(self.created)
+        return super().make_connection()
+
+    async def get_connection(self, *args, **kwargs):
+        connection = await super().get_connection(*args, **kwargs)
+        self._counted.add(connection)
+        REDIS_POOL_IN_USE.set(self.in_use)
+        return connection
+
+    async def release(self, connection):
+        await super().release(connection)
+        if connection in self._counted:
+            self._counted.discard(connection)
+            REDIS_POOL_IN_USE.set(self.in_use)
+
+
+async def init_redis():
+    """
+    Create the process-wide connection pool.
+
+    Called once from the FastAPI `lifespan` at startup. Celery workers (and any
+    other caller) get it lazily on the first `get_redis()`.
+    A BlockingConnectionPool makes callers wait (up to REDIS_POOL_TIMEOUT) for a
+    free connection instead of opening unlimited new ones under load.
+    """
+    global _pool, _client, _pid
+    _pool = InstrumentedPool.from_url(
+        REDIS_URL,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+    )
+    _client = redis.Redis(connection_pool=_pool)
+    _pid = os.getpid()
+    return _client
+
+
+async def close_redis():
+    """Close the pool (FastAPI `lifespan` shutdown)."""
+    global _pool, _client, _pid
+    if _client is not None:
+        await _client.aclose()
+        await _pool.disconnect()
+    _pool = _client = _pid = None
 
 
 async def get_redis():
-    # Create a Redis client using redis-py asyncio
-    return redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    # Shared client of this process (re-created after a fork)
+    if _client is None or _pid != os.getpid():
+        await init_redis()
+    return _client
+
+
+def publish_invalidation(client, keys: list[str]):
+    """
+    LOCAL_CACHE_MODE=pubsub: tell every worker's local cache that `keys` changed
+    (a key ending with ":" stands for a prefix). Works on a client or a pipeline.
+    No-op in the other modes (with CLIENT TRACKING Redis does it by itself).
+    """
+    if LOCAL_CACHE_MODE == "pubsub" and keys:
+        return client.publish(PUBSUB_CHANNEL, "\n".join(keys))
+
+
+def pool_stats() -> dict:
+    """
+    Output:
+      {"max": 50, "created": 12, "in_use": 3, "available": 9}
+    """
+    if _pool is None:
+        return {"max": REDIS_MAX_CONNECTIONS, "created": 0, "in_use": 0, "available": 0}
+    return {
+        "max": _pool.max_connections,
+        "created": _pool.created,
+        "in_use": _pool.in_use,
+        "available": _pool.created - _pool.in_use,
+    }
+
+
+def encode(value) -> bytes:
+    """
+    Python object → bytes stored in Redis.
+
+    Example (CACHE_CODEC=json):
+      encode([{"id": 1}]) → b'j[{"id":1}]'
+    """
+    if CACHE_CODEC == "msgpack":
+        data = _MSGPACK + msgpack.packb(value, use_bin_type=True)
+    else:
+        data = _JSON + json.dumps(value, separators=(",", ":")).encode()
+
+    if CACHE_COMPRESS_MIN_BYTES and len(data) >= CACHE_COMPRESS_MIN_BYTES:
+        data = _ZSTD + zstandard.ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def decode(data: bytes):
+    """bytes stored by `encode()` → Python object."""
+    if data[:1] == _ZSTD:
+        data = zstandard.ZstdDecompressor().decompress(data[1:])
+    if data[:1] == _MSGPACK:
+        return msgpack.unpackb(data[1:], raw=False)
+    if data[:1] == _JSON:
+        return json.loads(data[1:])
+    # values written before the codec header existed
+    return json.loads(data)
 
 
 async def get_cache(key: str):
@@ -20,17 +210,19 @@ async def get_cache(key: str):
         - None if the key does not exist or Redis returns empty.
 
     Explanation:
-        1) Opens a Redis connection via `get_redis()`.
+        1) Takes a connection from the shared pool via `get_redis()`.
         2) Reads the raw stored value using `redis.get(key)`.
-        3) Redis stores values as bytes → if present, the code JSON-decodes it.
+        3) Redis stores values as bytes → if present, `decode()` turns them
+           back into Python objects (json / msgpack, optionally zstd).
         4) If nothing exists (cache miss), returns None.
     """
     redis = await get_redis()
     data = await redis.get(key)
+    count_lookup("redis", key, bool(data))
     if data:
-        # convert => "[{\"id\":1,\"name\":\"Book\"},{\"id\":2,\"name\":\"Pen\"}]"
+        # convert => b'j[{"id":1,"name":"Book"},{"id":2,"name":"Pen"}]'
         # to => [ {"id": 1, "name": "Book"} , {"id": 2, "name": "Pen"} ]
-        return json.loads(data)
+        return decode(data)
     return None
 
 
@@ -58,7 +250,147 @@ async def set_cache(key: str, value, ttl: int = 60):
      items → [{"id": 1, "name": "Item1"} , {"id": 2, "name": "Pen"}]
     """
     redis = await get_redis()
-    await redis.set(key, json.dumps(value), ex=ttl)
+    await redis.set(key, encode(value), ex=ttl)
+
+
+async def get_many(keys: list[str]) -> list:
+    """
+    Read several keys in ONE round trip (MGET).
+
+    Output:
+      list with one entry per key, None for misses
+
+    Example:
+      await get_many(["items:limit=10", "items:limit=100"]) → [[...], None]
+    """
+    if not keys:
+        return []
+    redis = await get_redis()
+    values = await redis.mget(keys)
+    for key, data in zip(keys, values):
+        count_lookup("redis", key, bool(data))
+    return [decode(data) if data else None for data in values]
+
+
+async def set_many(values: dict, ttl: int = 60):
+    """
+    Write several keys in ONE round trip (pipelined SET ... EX).
+
+    Example:
+      await set_many({"items:limit=10": [...], "items:limit=100": [...]}, ttl=60)
+    """
+    if not values:
+        return
+    redis = await get_redis()
+    async with redis.pipeline(transaction=False) as pipe:
+        for key, value in values.items():
+            pipe.set(key, encode(value), ex=ttl)
+        await pipe.execute()
+
+
+async def get_raw(key: str):
+    """
+    Read a pre-serialized HTTP body and its metadata (ETag, ...) in one MGET.
+
+    Input:
+      key: str → e.g. "items:v7:list:limit=100"
+
+    Output:
+      (body: bytes, meta: dict) on a hit, None on a miss
+
+    The body is returned exactly as stored: no decode, no validation,
+    no re-serialization. It can be sent to the client as is.
+    Hot entries come from the worker's local cache (LOCAL_CACHE_MODE).
+    """
+    cached = local_cache.get(key)
+    if cached is not MISS:
+        count_lookup("local", key, True)
+        return cached
+
+    snapshot = local_cache.snapshot()
+    redis = await get_redis()
+    body, meta = await redis.mget([key, f"{key}:meta"])
+    count_lookup("redis", key, body is not None and meta is not None)
+    if body is None or meta is None:
+        return None
+    value = (body, json.loads(meta))
+    local_cache.set(key, value, snapshot)
+    return value
+
+
+async def set_raw(key: str, body: bytes, meta: dict, ttl: int = 60):
+    """
+    Store a pre-serialized HTTP body (e.g. JSON bytes) and its metadata.
+
+    Example:
+      await set_raw("items:v7:list:limit=100", b'[{"id":1,...}]', {"etag": '"ab12"'})
+    """
+    redis = await get_redis()
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.set(key, body, ex=ttl)
+        pipe.set(f"{key}:meta", json.dumps(meta), ex=ttl)
+        # end of a load started with begin_page_load() (no-op otherwise)
+        pipe.delete(f"{key}:loading")
+        publish_invalidation(pipe, [key])
+        await pipe.execute()
+
+
+async def get_many_raw(keys: list[str]) -> list:
+    """
+    MGET of pre-serialized bodies, returned as stored (bytes or None per key).
+
+    Example:
+      await get_many_raw(["item:1", "item:2"]) → [b'{"id":1,...}', None]
+    """
+    if not keys:
+        return []
+    values = [local_cache.get(key) for key in keys]
+    missing = []
+    for key, value in zip(keys, values):
+        if value is MISS:
+            missing.append(key)
+        else:
+            count_lookup("local", key, True)
+    if missing:
+        snapshot = local_cache.snapshot()
+        redis = await get_redis()
+        fetched = dict(zip(missing, await redis.mget(missing)))
+        for key, body in fetched.items():
+            count_lookup("redis", key, body is not None)
+            if body is not None:
+                local_cache.set(key, body, snapshot)
+        values = [
+            fetched[key] if value is MISS else value for key, value in zip(keys, values)
+        ]
+    return values
+
+
+async def set_many_raw(values: dict):
+    """
+    Pipelined SET ... EX of pre-serialized bodies, each with its own TTL.
+
+    Example:
+      await set_many_raw({"item:1": (b'{"id":1,...}', 300), "item:9": (ITEM_MISSING, 30)})
+    """
+    if not values:
+        return
+    redis = await get_redis()
+    async with redis.pipeline(transaction=False) as pipe:
+        for key, (body, ttl) in values.items():
+            pipe.set(key, body, ex=ttl)
+        publish_invalidation(pipe, list(values))
+        await pipe.execute()
+
+
+async def delete_many(keys: list[str]):
+    """UNLINK several keys in one command (memory is freed in the background)."""
+    if not keys:
+        return
+    redis = await get_redis()
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.unlink(*keys)
+        publish_invalidation(pipe, keys)
+        await pipe.execute()
 
 
 async def delete_cache(key: str):
@@ -76,3 +408,233 @@ async def delete_cache(key: str):
     """
     redis = await get_redis()
     await redis.delete(key)
+
+
+# --------------------
+# Single items (cache-aside)
+# --------------------
+# "item:42" → the JSON body of item 42, or ITEM_MISSING (negative cache): ids
+# that do not exist are remembered for a short time, so repeated lookups of
+# unknown ids do not reach Postgres. Create tasks delete the keys of new ids.
+ITEM_MISSING = b""
+
+
+def item_key(item_id: int) -> str:
+    """
+    Example:
+      item_key(42) → "item:42"
+    """
+    return f"item:{item_id}"
+
+
+# --------------------
+# Namespace versioning (generation-based invalidation)
+# --------------------
+# Keys of a namespace embed its current version: "items:v7:limit=100".
+# Writers invalidate the whole namespace with ONE atomic INCR of "ns:items";
+# readers then build "items:v8:..." keys and simply never see the old entries,
+# which expire by their TTL. No KEYS, no mass DELETE on the hot path.
+ITEMS_NAMESPACE = "items"
+
+
+async def get_namespace_version(namespace: str) -> int:
+    """
+    Example:
+      await get_namespace_version("items") → 7   (0 if never bumped)
+    """
+    key = f"ns:{namespace}"
+    cached = local_cache.get(key)
+    if cached is not MISS:
+        count_lookup("local", key, True)
+        return cached
+
+    snapshot = local_cache.snapshot()
+    redis = await get_redis()
+    version = await redis.get(key)
+    count_lookup("redis", key, version is not None)
+    version = int(version) if version else 0
+    local_cache.set(key, version, snapshot)
+    return version
+
+
+async def bump_namespace(namespace: str) -> int:
+    """Invalidate every key of the namespace at once. Returns the new version."""
+    redis = await get_redis()
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.incr(f"ns:{namespace}")
+        publish_invalidation(pipe, [f"ns:{namespace}"])
+        version, *_ = await pipe.execute()
+    return version
+
+
+def versioned_key(namespace: str, version: int, suffix: str) -> str:
+    """
+    Example:
+      versioned_key("items", 7, "limit=100") → "items:v7:limit=100"
+    """
+    return f"{namespace}:v{version}:{suffix}"
+
+
+async def sweep_namespace(namespace: str, batch: int = 500) -> int:
+    """
+    Delete keys of older versions of a namespace. Returns the number of deleted keys.
+
+    Runs off the hot path (Celery beat, see tasks.sweep_items_cache): SCAN walks
+    the keyspace in small steps, so Redis keeps serving other clients in between,
+    and UNLINK frees memory in a background thread.
+    """
+    redis = await get_redis()
+    current = f"{namespace}:v{await get_namespace_version(namespace)}:".encode()
+    deleted = 0
+    stale = []
+    async for key in redis.scan_iter(match=f"{namespace}:v*", count=batch):
+        if not key.startswith(current):
+            stale.append(key)
+        if len(stale) >= batch:
+            deleted += await redis.unlink(*stale)
+            stale = []
+    if stale:
+        deleted += await redis.unlink(*stale)
+    return deleted
+
+
+# --------------------
+# Write-through of list pages
+# --------------------
+# Cached list pages ("items:v7:list:limit=100:after=0") are registered in a set
+# per version ("items:v7:pages"). After an insert, append_to_pages() adds the
+# new items to the end of the last page(s) in Redis instead of invalidating
+# every page, so readers keep hitting the cache under steady write traffic.
+#
+# Pages are ordered by id and new ids are the highest, so only a page without a
+# next cursor can receive them. Page meta must hold: limit, count, after, last_id.
+#
+# Returns -1 (the caller then bumps the namespace) when the update is not safe:
+#   - an item id falls inside ANY cached page, full or not (inserts committed
+#     out of order, or a reader already cached it): after < id <= last_id,
+#   - any page is being loaded from Postgres right now (its snapshot may miss
+#     the new items and would overwrite the update), whichever page it is,
+#   - a page has no write-through metadata (written by an older version).
+# Pages changed before returning -1 are dropped by that bump as well.
+#
+#   KEYS[1] = pages index, then per page: page, page:meta, page:loading
+#   ARGV = id1, json1, id2, json2, ... (sorted by id)
+# Every key is passed in KEYS (script rules). Single Redis node: under Redis
+# Cluster the page keys and the index would need a common {hash tag}.
+_APPEND_TO_PAGES_LUA = """
+local items = {}
+for i = 1, #ARGV, 2 do
+    items[#items + 1] = {tonumber(ARGV[i]), ARGV[i + 1]}
+end
+
+local updated = 0
+for k = 2, #KEYS, 3 do
+    local page, meta_key, loading_key = KEYS[k], KEYS[k + 1], KEYS[k + 2]
+    if redis.call("EXISTS", loading_key) == 1 then
+        return -1
+    end
+    local raw_meta = redis.call("GET", meta_key)
+    local body = redis.call("GET", page)
+    if not raw_meta or not body then
+        redis.call("SREM", KEYS[1], page)
+    else
+        local meta = cjson.decode(raw_meta)
+        if meta["limit"] == nil then
+            return -1
+        end
+        local count = meta["count"]
+        local last = meta["after"]
+        if meta["last_id"] ~= cjson.null then
+            last = meta["last_id"]
+        end
+        for _, item in ipairs(items) do
+            if item[1] > meta["after"] and item[1] <= last then
+                return -1
+            end
+        end
+        if meta["next"] == cjson.null then
+            local added = {}
+            for _, item in ipairs(items) do
+                if item[1] > last and count < meta["limit"] then
+                    added[#added + 1] = item[2]
+                    count = count + 1
+                    last = item[1]
+                    if count == meta["limit"] then
+                        meta["next"] = last
+                    end
+                end
+            end
+            if #added > 0 then
+                if meta["count"] == 0 then
+                    body = "[" .. table.concat(added, ",") .. "]"
+                else
+                    body = string.sub(body, 1, -2) .. "," .. table.concat(added, ",") .. "]"
+                end
+                meta["count"] = count
+                meta["last_id"] = last
+                meta["etag"] = '"' .. redis.sha1hex(body) .. '"'
+                redis.call("SET", page, body, "KEEPTTL")
+                redis.call("SET", meta_key, cjson.encode(meta), "KEEPTTL")
+                updated = updated + 1
+            end
+        end
+    end
+end
+return updated
+"""
+
+
+def pages_key(namespace: str, version: int) -> str:
+    """
+    Example:
+      pages_key("items", 7) → "items:v7:pages"
+    """
+    return versioned_key(namespace, version, "pages")
+
+
+async def begin_page_load(namespace: str, version: int, key: str, ttl: int = 60):
+    """
+    Register a list page before querying Postgres for it.
+
+    The ":loading" mark (removed by set_raw) tells append_to_pages that a
+    snapshot of this page is being taken, so it falls back to invalidation.
+    """
+    redis = await get_redis()
+    index = pages_key(namespace, version)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.set(f"{key}:loading", 1, px=PAGE_LOAD_MARK_MS)
+        pipe.sadd(index, key)
+        pipe.expire(index, ttl)
+        await pipe.execute()
+
+
+async def append_to_pages(namespace: str, items: list[tuple[int, str]]) -> bool:
+    """
+    Write-through: append new items to the cached pages of the current version.
+
+    Input:
+      items: [(id, json)] → e.g. [(101, '{"id":101,"name":"Pen","description":null}')]
+
+    Output:
+      True if the cache is up to date, False if the caller must invalidate
+      (bump_namespace) instead: an id inside a cached page (full or not), or
+      a ":loading" mark on ANY page forces that full bump.
+
+    The page keys are read from the index first and passed to the script. A
+    page registered after that read starts its load after this insert
+    committed, so its snapshot already has the new items.
+    """
+    redis = await get_redis()
+    index = pages_key(namespace, await get_namespace_version(namespace))
+    keys = [index]
+    for page in await redis.smembers(index):
+        keys += [page, page + b":meta", page + b":loading"]
+    args = []
+    for item_id, item_json in sorted(items):
+        args += [item_id, item_json]
+    if await redis.eval(_APPEND_TO_PAGES_LUA, len(keys), *keys, *args) < 0:
+        return False
+    if LOCAL_CACHE_MODE == "pubsub":
+        # the script may have changed any page of the namespace
+        await publish_invalidation(redis, [f"{namespace}:"])
+    return True
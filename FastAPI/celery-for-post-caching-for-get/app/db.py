@@ -1,17 +1,129 @@
+import asyncio
 import os
+import random
+import time
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .metrics import (
+    DB_POOL_CHECKOUT_TIME,
+    DB_POOL_CONFIGURED_SIZE,
+    DB_POOL_CONNECTIONS_OPENED,
+    DB_POOL_IN_USE,
+    DB_POOL_OVERFLOW,
+)
 
 
-DATABASE_URL = "postgresql+asyncpg://postgres:postgres@db:5432/db"
+DATABASE_URL = os.getenv(
+    "DATABASE_URL", "postgresql+asyncpg://postgres:postgres@db:5432/db"
+)
 
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,
-    future=True,
+# --------------------
+# Pool settings (per worker process: Postgres sees workers × (size + overflow))
+# --------------------
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # max wait for a connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds, -1 = never
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+# connections opened at startup (lifespan), so the first requests do not pay the connect
+DB_POOL_WARM = int(os.getenv("DB_POOL_WARM", str(DB_POOL_SIZE)))
+# asyncpg prepared statements kept per connection (SQLAlchemy default 100): every
+# hot query (list page, ids lookup, insert) is parsed/planned once per connection
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(
+    os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "500")
 )
+# fraction of SQL statements logged: 0 = none, 1 = all (what echo=True did)
+DB_ECHO_SAMPLE_RATE = float(os.getenv("DB_ECHO_SAMPLE_RATE", "0"))
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that measures how long a checkout takes (waiting for a free
+    connection, or opening a new one) and keeps the in-use / overflow gauges
+    up to date.
+
+    The gauges are set after the pool itself changed: the "checkin" event
+    fires before the connection is back in the queue, so checkedout() read
+    there still counts it.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_TIME.observe(time.perf_counter() - start)
+            self._update_gauges()
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._update_gauges()
+
+    def _update_gauges(self):
+        DB_POOL_IN_USE.set(self.checkedout())
+        DB_POOL_OVERFLOW.set(max(self.overflow(), 0))
+
+
+def make_engine():
+    """
+    Async engine configured from the DB_* environment variables, with pool
+    metrics (app/metrics.py) and sampled statement logging attached.
+    """
+    url = make_url(DATABASE_URL).update_query_dict(
+        {"prepared_statement_cache_size": str(DB_PREPARED_STATEMENT_CACHE_SIZE)}
+    )
+    new_engine = create_async_engine(
+        url,
+        future=True,
+        poolclass=InstrumentedPool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    sync_engine = new_engine.sync_engine
+    event.listen(
+        sync_engine, "connect", lambda *args: DB_POOL_CONNECTIONS_OPENED.inc()
+    )
+    DB_POOL_CONFIGURED_SIZE.set(DB_POOL_SIZE)
+
+    if DB_ECHO_SAMPLE_RATE > 0:
+        # echo=True logs every statement synchronously: under load the logging
+        # costs more than the queries. A sample is enough to see what runs.
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def log_sampled_statement(conn, cursor, statement, parameters, context, many):
+            if random.random() < DB_ECHO_SAMPLE_RATE:
+                print(f"🔎 SQL (sampled): {statement} {parameters!r}")
+
+    return new_engine
+
+
+engine = make_engine()
+
+
+async def warm_pool(connections: int = DB_POOL_WARM):
+    """
+    Open `connections` pooled connections at once and give them back.
+
+    Called from the FastAPI lifespan: replaces the old single test connection
+    and fails startup the same way if Postgres is unreachable.
+    """
+    connections = min(connections, DB_POOL_SIZE + DB_MAX_OVERFLOW)
+
+    async def checkout():
+        conn = await engine.connect()
+        await conn.execute(text("SELECT 1"))
+        return conn
+
+    conns = await asyncio.gather(*(checkout() for _ in range(max(connections, 1))))
+    for conn in conns:
+        await conn.close()
 
 # For API s
 async_session = async_sessionmaker(
@@ -0,0 +1,68 @@
+import hashlib
+import os
+
+from fastapi import Request, Response
+
+# Clients / nginx may reuse a response this long, then revalidate it (If-None-Match)
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "5"))
+
+
+def make_etag(body: bytes) -> str:
+    """
+    Strong validator for a response body.
+
+    Example:
+      make_etag(b'[{"id":1}]') → '"9b2c5f6e1d0a4c7e8f3b2a1d0c9e8f7a"'
+    """
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """True when the client already has this version (If-None-Match)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # weak comparison: W/"x" matches "x"
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def cache_headers(etag: str) -> dict:
+    """Validator + freshness headers shared by 200 and 304 responses."""
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={HTTP_CACHE_MAX_AGE}",
+        "Vary": "Accept-Encoding",
+    }
+
+
+def next_page_headers(request: Request, next_id: int | None) -> dict:
+    """
+    Link / X-Next-Cursor headers pointing at the next page (none on the last page).
+
+    Example:
+      Link: <http://api/items?limit=100&after_id=100>; rel="next"
+      X-Next-Cursor: 100
+    """
+    if next_id is None:
+        return {}
+    url = request.url.include_query_params(after_id=next_id)
+    return {"Link": f'<{url}>; rel="next"', "X-Next-Cursor": str(next_id)}
+
+
+def raw_json_response(
+    request: Request, body: bytes, etag: str, headers: dict | None = None
+) -> Response:
+    """
+    Send already-serialized JSON bytes as is (no validation / re-serialization).
+    Answers 304 without a body when the client's ETag is still current.
+
+    The ETag comes with the cached entry (computed once when it was stored), so
+    a 304 costs one Redis read, or none with the local cache: no DB query.
+    """
+    headers = {**cache_headers(etag), **(headers or {})}
+    if if_none_match(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+
+from fastapi.responses import JSONResponse
+
+from .cache import get_redis
+
+IDEMPOTENCY_TTL = 60 * 60 * 24  # stored responses are replayed for 24h
+LOCK_TIMEOUT = 30  # seconds, the lock expires even if the worker holding it dies
+WAIT_TIMEOUT = 10  # seconds a concurrent duplicate waits for the first response
+POLL_INTERVAL = 0.05
+
+# Delete the lock only if we still own it: a request slower than LOCK_TIMEOUT
+# must not release the lock a duplicate request has taken since
+_RELEASE_LUA = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+def fingerprint(payload: dict) -> str:
+    """
+    Stable hash of the request body.
+    Same Idempotency-Key with a different body is rejected instead of replayed.
+    """
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+async def run_idempotent(scope: str, key: str, body_hash: str, handler):
+    """
+    Execute `handler` at most once per (scope, key).
+
+    Input:
+      scope: str → usually the route, e.g. "POST /items"
+      key: str → value of the Idempotency-Key header
+      body_hash: str → fingerprint() of the request body
+      handler: async callable returning (status_code, body_dict)
+
+    Output:
+      JSONResponse →
+        - the handler result for the first request (stored in Redis)
+        - the stored result for later duplicates (header Idempotent-Replayed: true)
+        - 409 if a concurrent duplicate waited too long, 422 on body mismatch
+
+    Example:
+      await run_idempotent("POST /items", "abc-123", fingerprint(item.model_dump()), handler)
+    """
+    redis = await get_redis()
+    lock_key = f"idem:{scope}:{key}:lock"
+    response_key = f"idem:{scope}:{key}:response"
+    token = uuid.uuid4().hex
+
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while True:
+        stored = await redis.get(response_key)
+        if stored:
+            stored = json.loads(stored)
+            if stored["fingerprint"] != body_hash:
+                return JSONResponse(
+                    {"error": "Idempotency-Key was already used with a different body"},
+                    status_code=422,
+                )
+            return JSONResponse(
+                stored["body"],
+                status_code=stored["status"],
+                headers={"Idempotent-Replayed": "true"},
+            )
+
+        # SET NX → only the first request gets the lock and runs the handler
+        if await redis.set(lock_key, token, nx=True, ex=LOCK_TIMEOUT):
+            break
+
+        if time.monotonic() >= deadline:
+            return JSONResponse(
+                {"error": "A request with this Idempotency-Key is still in progress"},
+                status_code=409,
+                headers={"Retry-After": "1"},
+            )
+        await asyncio.sleep(POLL_INTERVAL)
+
+    try:
+        status_code, body = await handler()
+        if status_code < 500:
+            await redis.set(
+                response_key,
+                json.dumps(
+                    {"status": status_code, "body": body, "fingerprint": body_hash}
+                ),
+                ex=IDEMPOTENCY_TTL,
+            )
+        return JSONResponse(body, status_code=status_code)
+    finally:
+        await redis.eval(_RELEASE_LUA, 1, lock_key, token)
@@ -0,0 +1,194 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+# Channel of the invalidation messages:
+#   "tracking" → Redis itself pushes them here (CLIENT TRACKING ... REDIRECT)
+#   "pubsub"   → writers of app.cache PUBLISH the keys they change (Redis < 6)
+TRACKING_CHANNEL = "__redis__:invalidate"
+PUBSUB_CHANNEL = "cache:invalidate"
+
+MISS = object()
+
+
+class LocalCache:
+    """
+    In-process LRU in front of Redis, kept coherent by invalidation messages.
+
+    Hot keys (e.g. "ns:items" and the cached /items pages) are served from the
+    worker's memory without a Redis round trip. A background task listens for
+    invalidations and evicts a key as soon as it is changed anywhere (INCR of
+    the namespace by create_item_task, SET of a refreshed page, expiry, ...).
+
+    Modes:
+      "tracking": server-assisted client-side caching. One connection runs
+          CLIENT TRACKING ON REDIRECT <subscriber> BCAST PREFIX ns: ...,
+          Redis then publishes every change of a matching key (RESP2 compatible).
+      "pubsub": fallback without CLIENT TRACKING, app.cache publishes the keys
+          it writes (a key ending with ":" invalidates that prefix).
+      "off": disabled, every lookup is a MISS.
+
+    The cache only serves entries while the invalidation channel is connected;
+    on a disconnect everything is dropped until it is back. Entries also expire
+    after `max_age` seconds as a safety net.
+    """
+
+    def __init__(self, url, mode, prefixes, max_entries=1000, max_age=30.0):
+        self.url = url
+        self.mode = mode
+        self.prefixes = prefixes
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.connected = False
+        self._data = OrderedDict()  # key -> (stored_at, value)
+        self._seq = 0  # incremented by every invalidation message
+        self._task = None
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    # --------------------
+    # lookups
+    # --------------------
+    def get(self, key):
+        """The cached value, or MISS."""
+        entry = self._data.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.max_age:
+            self.misses += 1
+            return MISS
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def snapshot(self) -> int:
+        """
+        Call before reading a key from Redis, pass the result to `set()`.
+
+        If an invalidation arrives while the read is in flight, the value read
+        may already be outdated: `set()` then drops it instead of caching it.
+        """
+        return self._seq
+
+    def set(self, key, value, snapshot: int):
+        if not self.connected or snapshot != self._seq:
+            return
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, keys):
+        """keys: list of keys/prefixes (str or bytes), None → everything."""
+        self._seq += 1
+        if keys is None:
+            self.invalidations += len(self._data)
+            self._data.clear()
+            return
+        for key in keys:
+            if isinstance(key, bytes):
+                key = key.decode()
+            if key.endswith(":"):
+                stale = [k for k in self._data if k.startswith(key)]
+            else:
+                # "items:v7:list:...:meta" is stored together with its body key
+                stale = [key, key.removesuffix(":meta")]
+            for k in stale:
+                if self._data.pop(k, None) is not None:
+                    self.invalidations += 1
+
+    def stats(self) -> dict:
+        """
+        Output:
+          {"mode": "tracking", "connected": True, "size": 12, "hits": 9500, ...}
+        """
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "connected": self.connected,
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    # --------------------
+    # invalidation listener
+    # --------------------
+    def start(self):
+        """Start listening (FastAPI lifespan). No-op when mode is "off"."""
+        if self.mode != "off" and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError) as e:
+                print(f"⚠️ local cache invalidation channel lost: {e!r}")
+            # without the channel nothing cached can be trusted
+            self.connected = False
+            self.invalidate(None)
+            await asyncio.sleep(1)
+
+    async def _listen(self):
+        # dedicated connections, outside the shared pool
+        name = f"local-cache-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        subscriber = redis.Redis.from_url(self.url, client_name=name)
+        tracker = redis.Redis.from_url(self.url, single_connection_client=True)
+        pubsub = subscriber.pubsub()
+        try:
+            if self.mode == "tracking":
+                await pubsub.subscribe(TRACKING_CHANNEL)
+                clients = await tracker.client_list(_type="pubsub")
+                subscriber_id = next((c["id"] for c in clients if c["name"] == name), None)
+                if subscriber_id is None:
+                    raise RedisError("invalidation subscriber not found in CLIENT LIST")
+                # Tracking lives as long as the tracker connection: it stays open
+                # and is pinged below, a broken tracker restarts everything.
+                await tracker.client_tracking_on(
+                    clientid=subscriber_id, prefix=list(self.prefixes), bcast=True
+                )
+            else:
+                await pubsub.subscribe(PUBSUB_CHANNEL)
+
+            self.invalidate(None)
+            self.connected = True
+            print(f"✅ local cache listening for invalidations ({self.mode})")
+
+            last_ping = time.monotonic()
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                if message is not None:
+                    data = message["data"]
+                    if data is None or isinstance(data, list):
+                        self.invalidate(data)  # tracking: list of keys, None = flush
+                    else:
+                        self.invalidate(data.split(b"\n"))
+                if time.monotonic() - last_ping > 5:
+                    await tracker.ping()
+                    last_ping = time.monotonic()
+        finally:
+            self.connected = False
+            await pubsub.aclose()
+            await subscriber.aclose()
+            await tracker.aclose()
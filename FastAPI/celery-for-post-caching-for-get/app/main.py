@@ -1,42 +1,143 @@
+import os
+import time
 from contextlib import asynccontextmanager
-from typing import Annotated, List
+from typing import Annotated, List, Literal
 
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import (
+    Body,
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
 from app.db import get_session
 
 from app import crud, db, schemas, tasks
-from .cache import get_cache, set_cache
-from .db import engine, get_session
+from .cache import (
+    ITEM_MISSING,
+    ITEMS_NAMESPACE,
+    begin_page_load,
+    close_redis,
+    get_many_raw,
+    get_namespace_version,
+    get_raw,
+    init_redis,
+    item_key,
+    local_cache,
+    pool_stats,
+    set_many_raw,
+    set_raw,
+    versioned_key,
+)
+from .http_cache import make_etag, next_page_headers, raw_json_response
+from .idempotency import fingerprint, run_idempotent
+from .metrics import latest_metrics
+from .middleware import MetricsMiddleware
+from .singleflight import refresh_in_background, single_flight
+from .db import engine, get_session, warm_pool
 
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("🚀 Starting up... Testing DB connection")
+    print("🚀 Starting up... Warming the DB connection pool")
     try:
-        async with engine.begin() as conn:
-            await conn.run_sync(lambda x: None)
+        await warm_pool()
         print("✅ DB connection OK")
     except Exception as e:
         print("❌ DB connection failed:", e)
         raise e
 
+    # One Redis connection pool per worker process
+    redis = await init_redis()
+    await redis.ping()
+    print("✅ Redis connection pool ready")
+
+    # in-process cache of hot keys (LOCAL_CACHE_MODE), kept coherent by Redis
+    local_cache.start()
+
     yield
 
     print("🔻 Shutting down... Closing engine")
     await engine.dispose()
+    await local_cache.stop()
+    await close_redis()
 
 
 app = FastAPI(lifespan=lifespan)
+# per-route request count / latency / in-flight (app/middleware.py)
+app.add_middleware(MetricsMiddleware, routes=app.router.routes)
 
 
 @app.post("/items", status_code=201)
-async def create_item_endpoint(item: schemas.ItemCreate):
-    tasks.create_item_task.delay(item.dict())
-    return {"message": "Item creation in progress"}
+async def create_item_endpoint(
+    item: schemas.ItemCreate,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+):
+    if idempotency_key is None:
+        tasks.create_item_task.delay(item.dict())
+        return {"message": "Item creation in progress"}
+
+    # Retries with the same key must not enqueue a second create_item_task
+    async def enqueue():
+        tasks.create_item_task.delay(item.dict())
+        return 201, {"message": "Item creation in progress"}
+
+    return await run_idempotent(
+        "POST /items", idempotency_key, fingerprint(item.model_dump()), enqueue
+    )
+
+
+# Items per create_items_batch_task (one INSERT + one cache invalidation each)
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "500"))
+MAX_BATCH_SIZE = 10_000
+ItemBatch = Annotated[
+    list[schemas.ItemCreate], Body(min_length=1, max_length=MAX_BATCH_SIZE)
+]
+
+
+@app.post("/items/batch", status_code=202)
+async def create_items_batch_endpoint(
+    items: ItemBatch,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+):
+    """
+    Create many items with one request.
+
+    Example:
+      POST /items/batch  [{"name": "Pen"}, {"name": "Book"}, ...]  (1200 items)
+      → 3 tasks of 500/500/200 items instead of 1200 create_item_task messages
+    """
+    payload = [item.model_dump() for item in items]
+
+    async def enqueue():
+        chunks = [
+            payload[i : i + BATCH_CHUNK_SIZE]
+            for i in range(0, len(payload), BATCH_CHUNK_SIZE)
+        ]
+        for chunk in chunks:
+            tasks.create_items_batch_task.delay(chunk)
+        return 202, {
+            "message": "Item creation in progress",
+            "items": len(payload),
+            "tasks": len(chunks),
+        }
+
+    if idempotency_key is None:
+        status_code, body = await enqueue()
+        return body
+
+    return await run_idempotent(
+        "POST /items/batch", idempotency_key, fingerprint({"items": payload}), enqueue
+    )
 
 
 # Without Celery
@@ -46,42 +147,230 @@ async def create_item_endpoint(item: schemas.ItemCreate):
 #     return created
 
 
+# Fresh for ITEMS_CACHE_TTL seconds. With ITEMS_STALE_TTL > 0 the entry is kept
+# that much longer and served stale while ONE request refreshes it in the background
+ITEMS_CACHE_TTL = int(os.getenv("ITEMS_CACHE_TTL", "60"))
+ITEMS_STALE_TTL = int(os.getenv("ITEMS_STALE_TTL", "0"))
+
+
+async def load_items_page(
+    cache_key: str, version: int, limit: int, after_id: int | None
+):
+    """
+    Query Postgres, serialize the page once and store it. Returns (body, meta).
+
+    Opens its own session: it may outlive the request that started it
+    (background refresh) and runs only once per key (see `single_flight`).
+    The page is registered for write-through updates (CACHE_WRITE_MODE).
+    """
+    ttl = ITEMS_CACHE_TTL + ITEMS_STALE_TTL
+    await begin_page_load(ITEMS_NAMESPACE, version, cache_key, ttl)
+    # NOTE: the page is serialized by Postgres (crud.list_items_json, json_agg):
+    # no ORM objects, no identity map, no per-row ItemRead validation. The body
+    # is exactly what is cached and sent:
+    #   body = b'[{"id": 1, "name": "Book", "description": null}, ...]'
+    async with db.async_session() as session:
+        body, count, last_id = await crud.list_items_json(
+            session, limit=limit, after_id=after_id
+        )
+
+    meta = {
+        "etag": make_etag(body),
+        "fresh_until": time.time() + ITEMS_CACHE_TTL,
+        "next": last_id if count == limit else None,
+        # used by write-through (cache.append_to_pages) to extend the page
+        "limit": limit,
+        "count": count,
+        "after": after_id or 0,
+        "last_id": last_id,
+    }
+
+    await set_raw(cache_key, body, meta, ttl=ttl)
+    return body, meta
+
+
+def parse_ids(ids: str) -> list[int]:
+    """
+    "3,1,3" → [3, 1] (request order, duplicates removed), 422 on bad input.
+    """
+    try:
+        parsed = list(dict.fromkeys(int(i) for i in ids.split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(
+            status_code=422, detail="ids must be comma-separated integers"
+        )
+    if not parsed or len(parsed) > crud.MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=422, detail=f"ids must contain 1 to {crud.MAX_PAGE_SIZE} ids"
+        )
+    return parsed
+
+
 @app.get("/items", response_model=List[schemas.ItemRead])
 async def get_items_endpoint(
-    limit: int = 100, db: AsyncSession = Depends(db.get_session)
+    request: Request,
+    limit: int = Query(100, ge=1, le=crud.MAX_PAGE_SIZE),
+    after_id: int | None = Query(None, ge=0),
+    ids: str | None = Query(None, description="e.g. 1,2,3 → those items only"),
 ):
-    cache_key = f"items:limit={limit}"
+    if ids is not None:
+        # batch lookup: MGET of "item:<id>" + one ANY query for the misses
+        wanted = parse_ids(ids)
+        found, misses = await lookup_items(wanted)
+        body = b"[" + b",".join(found[i] for i in wanted if i in found) + b"]"
+        headers = {"X-Cache": "MISS" if misses else "HIT"}
+        return raw_json_response(request, body, make_etag(body), headers)
+
+    # "items:v<version>:list:limit=100:after=0" → one entry per page (cursor);
+    # a write bumps the version instead of deleting keys
+    version = await get_namespace_version(ITEMS_NAMESPACE)
+    cache_key = versioned_key(
+        ITEMS_NAMESPACE, version, f"list:limit={limit}:after={after_id or 0}"
+    )
 
-    cached = await get_cache(cache_key)
+    def load():
+        return load_items_page(cache_key, version, limit, after_id)
+
+    def read_cached():
+        return get_raw(cache_key)
+
+    # Fast path: the cached value IS the response body.
+    # No json.loads, no response_model validation, no re-serialization.
+    cached = await get_raw(cache_key)
     if cached:
-        return cached
-    else:
-        items = await crud.list_items(db, limit=limit)
-
-        # NOTE: Pydantic models → dict
-        # Input:  a list of ORM objects (e.g., SQLAlchemy model instances)
-        # Output: a list of plain dicts ready for JSON serialization
-        #
-        # Explanation:
-        # `from_orm()` converts each ORM model instance into a Pydantic schema object.
-        # `.dict()` serializes that schema into a clean Python dictionary.
-        # This ensures the response contains JSON-safe, validated data rather than raw ORM objects.
-        # Example:
-        # ORM input:
-        #   items = [
-        #       Item(id=1, name="Book", price=12.5),
-        #       Item(id=2, name="Pen",  price=2.0)
-        #   ]
-        #
-        # After conversion:
-        #   data = [
-        #       {"id": 1, "name": "Book", "price": 12.5},
-        #       {"id": 2, "name": "Pen",  "price": 2.0}
-        #   ]
-        data = [schemas.ItemRead.model_validate(i).model_dump() for i in items]
-
-        await set_cache(cache_key, data, ttl=60)
-        return data
+        body, meta = cached
+        headers = next_page_headers(request, meta.get("next"))
+        if time.time() < meta.get("fresh_until", float("inf")):
+            headers["X-Cache"] = "HIT"
+            return raw_json_response(request, body, meta["etag"], headers)
+        # Stale (only possible with ITEMS_STALE_TTL > 0): answer now, refresh once
+        refresh_in_background(cache_key, load, read_cached)
+        headers["X-Cache"] = "STALE"
+        return raw_json_response(request, body, meta["etag"], headers)
+
+    # Miss (expired, or a new version after a write): without single-flight every
+    # concurrent request would run the same query and write the same entry.
+    # Here the requests of a worker share one load task, and one worker across all
+    # workers/replicas (Redis lock) queries Postgres; the others get its result.
+    body, meta = await single_flight(cache_key, load, read_cached)
+    headers = next_page_headers(request, meta.get("next"))
+    headers["X-Cache"] = "MISS"
+    return raw_json_response(request, body, meta["etag"], headers)
+
+
+def item_json(item) -> str:
+    # ORM object or Core row → '{"id":1,"name":"Book","description":null}'
+    return schemas.ItemRead.model_validate(item, from_attributes=True).model_dump_json()
+
+
+async def export_items_body(fmt: str):
+    """
+    Body of GET /items/export, one HTTP chunk per cursor fetch.
+
+    ndjson: one JSON object per line → {"id":1,...}
+                                        {"id":2,...}
+    json:   one JSON array, written piece by piece → [{"id":1,...},{"id":2,...}]
+
+    Opens its own session: the body is sent after the endpoint has returned.
+    """
+    async with db.async_session() as session:
+        if fmt == "json":
+            yield b"["
+        first = True
+        async for chunk in crud.stream_items(session):
+            rows = [item_json(item) for item in chunk]
+            if fmt == "ndjson":
+                yield ("\n".join(rows) + "\n").encode()
+            else:
+                yield (("" if first else ",") + ",".join(rows)).encode()
+            first = False
+        if fmt == "json":
+            yield b"]"
+
+
+@app.get("/items/export")
+async def export_items_endpoint(
+    fmt: Literal["ndjson", "json"] = Query("ndjson", alias="format"),
+):
+    """
+    Stream every item without building the list in memory:
+      curl -N http://localhost:8000/items/export              → NDJSON
+      curl -N http://localhost:8000/items/export?format=json  → JSON array
+    """
+    media_type = "application/x-ndjson" if fmt == "ndjson" else "application/json"
+    return StreamingResponse(
+        export_items_body(fmt),
+        media_type=media_type,
+        headers={"X-Accel-Buffering": "no"},  # nginx: pass chunks through as they come
+    )
+
+
+# --------------------
+# Items by id (cache-aside + negative cache)
+# --------------------
+ITEM_CACHE_TTL = int(os.getenv("ITEM_CACHE_TTL", "300"))
+ITEM_MISSING_TTL = int(os.getenv("ITEM_MISSING_TTL", "30"))
+
+
+async def lookup_items(ids: list[int]):
+    """
+    Items by id through the cache.
+
+    Output:
+      ({id: json body}, [ids that were not cached])
+      ids that do not exist are absent from the dict
+
+    Example:
+      await lookup_items([1, 2, 999]) → ({1: b'{"id":1,...}', 2: b'{"id":2,...}'}, [2])
+      → 1 MGET (1 hit, 999 cached as missing) + 1 query for id 2
+    """
+    cached = await get_many_raw([item_key(i) for i in ids])
+    found = {i: body for i, body in zip(ids, cached) if body}  # ITEM_MISSING is b""
+    misses = [i for i, body in zip(ids, cached) if body is None]
+    if not misses:
+        return found, misses
+
+    async with db.async_session() as session:
+        items = await crud.get_items_by_ids(session, misses)
+    loaded = {item.id: item_json(item).encode() for item in items}
+
+    # found ids for ITEM_CACHE_TTL, unknown ids (negative cache) for ITEM_MISSING_TTL
+    await set_many_raw(
+        {
+            item_key(i): (
+                (loaded[i], ITEM_CACHE_TTL)
+                if i in loaded
+                else (ITEM_MISSING, ITEM_MISSING_TTL)
+            )
+            for i in misses
+        }
+    )
+    found.update(loaded)
+    return found, misses
+
+
+# declared after /items/export, otherwise "export" would be matched as an {item_id}
+@app.get("/items/{item_id}", response_model=schemas.ItemRead)
+async def get_item_endpoint(request: Request, item_id: int):
+    found, misses = await lookup_items([item_id])
+    if item_id not in found:
+        raise HTTPException(status_code=404, detail="Item not found")
+    body = found[item_id]
+    headers = {"X-Cache": "MISS" if misses else "HIT"}
+    return raw_json_response(request, body, make_etag(body), headers)
+
+
+@app.get("/cache/stats")
+async def cache_stats_endpoint():
+    # Redis pool usage and local cache hits/evictions of this worker process
+    return {"pid": os.getpid(), "pool": pool_stats(), "local": local_cache.stats()}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    # Prometheus scrape (app/metrics.py): HTTP, DB pool and cache metrics of
+    # every Gunicorn worker when PROMETHEUS_MULTIPROC_DIR is set
+    return Response(latest_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 
 # Without caching
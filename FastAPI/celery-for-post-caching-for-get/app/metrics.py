@@ -0,0 +1,144 @@
+import os
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Gunicorn runs several worker processes: with PROMETHEUS_MULTIPROC_DIR set
+# (gunicorn.conf.py) each one writes its values to files in that directory and
+# `latest_metrics()` adds them up, whichever worker answers the scrape.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+
+# --------------------
+# HTTP requests (app/middleware.py)
+# --------------------
+# route: the path template ("/items/{item_id}"), never the raw URL, so the
+# number of series stays bounded
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests handled",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time from the start of a request to its last body chunk",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests currently being handled",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+
+# --------------------
+# SQLAlchemy connection pool (app/db.py)
+# --------------------
+# multiprocess_mode: with several Gunicorn workers each process reports its own
+# pool, the scrape shows their sum
+# queue wait for a free connection, PLUS the connect (TCP + auth) when the
+# checkout opens a new one (pool not full yet, or overflow)
+DB_POOL_CHECKOUT_TIME = Histogram(
+    "db_pool_checkout_seconds",
+    "Time to get a DB connection from the pool (wait + connect of new ones)",
+    buckets=(0.0005,) + LATENCY_BUCKETS,
+)
+DB_POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Connections open beyond pool_size",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CONFIGURED_SIZE = Gauge(
+    "db_pool_size",
+    "Configured pool_size",
+    multiprocess_mode="livesum",
+)
+# not "..._created": a Counter already exports a <name>_created timestamp series
+DB_POOL_CONNECTIONS_OPENED = Counter(
+    "db_pool_connections_opened",
+    "New DB connections opened by the pool (connect + auth)",
+)
+
+
+# --------------------
+# Cache lookups (app/cache.py)
+# --------------------
+# cache: "local" (in-process LRU, only hits are counted: its misses go on to
+# Redis) or "redis"; keyspace: first segment of the key (items, item, ns)
+CACHE_HIT = Counter(
+    "cache_hit_total",
+    "Cache hits",
+    ["cache", "keyspace"],
+)
+CACHE_MISS = Counter(
+    "cache_miss_total",
+    "Cache misses",
+    ["cache", "keyspace"],
+)
+
+# --------------------
+# Redis connection pool (app/cache.py)
+# --------------------
+REDIS_POOL_IN_USE = Gauge(
+    "redis_pool_connections_in_use",
+    "Redis connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+REDIS_POOL_OPEN = Gauge(
+    "redis_pool_connections_open",
+    "Redis connections opened by the pool (in use + idle)",
+    multiprocess_mode="livesum",
+)
+REDIS_POOL_MAX = Gauge(
+    "redis_pool_max_connections",
+    "Configured REDIS_MAX_CONNECTIONS",
+    multiprocess_mode="livesum",
+)
+
+# --------------------
+# Celery tasks (app/tasks.py), served by the worker on CELERY_METRICS_PORT
+# --------------------
+CELERY_TASKS_TOTAL = Counter(
+    "celery_tasks_total",
+    "Finished Celery tasks",
+    ["task_name", "status"],  # status: success | failure | retry
+)
+CELERY_TASKS_TIME = Histogram(
+    "celery_tasks_duration_seconds",
+    "Time spent in Celery tasks",
+    ["task_name"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def metrics_registry():
+    """
+    Registry to export: every worker's files in multiprocess mode, otherwise
+    the default registry of this process.
+    """
+    if not MULTIPROCESS:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def latest_metrics() -> bytes:
+    """Body of a /metrics scrape (Prometheus text format)."""
+    return generate_latest(metrics_registry())
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 
 
 class ItemCreate(BaseModel):
@@ -11,3 +11,8 @@ class ItemRead(BaseModel):
     id: int
     name: str
     description: str | None = None
+
+
+# list[ItemRead] validator/serializer, built once (building it per request is costly).
+# ItemListAdapter.dump_json(...) serializes straight to JSON bytes in pydantic-core.
+ItemListAdapter = TypeAdapter(list[ItemRead])
@@ -0,0 +1,96 @@
+import asyncio
+import time
+import uuid
+
+from .cache import get_redis
+
+LOCK_TTL_MS = 5000  # a crashed winner blocks the others at most this long
+WAIT_TIMEOUT = 5.0  # seconds a loser waits for the winner's result
+POLL_INTERVAL = 0.02
+
+# key -> load Task shared by every coroutine of this worker waiting for the same
+# key (also the strong reference that keeps a detached load alive)
+_inflight: dict[str, asyncio.Task] = {}
+
+# Delete the lock only if we still own it (it may have expired and been re-taken)
+_RELEASE_LUA = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+async def single_flight(key: str, load, read_cached):
+    """
+    Run `load()` once for concurrent misses of the same key.
+
+    Input:
+      key: str → the cache key, e.g. "items:v7:list:limit=100"
+      load: async () -> value → computes the value AND writes it to the cache
+      read_cached: async () -> value | None → reads the cache (used by losers)
+
+    Output:
+      the value computed by the winner (or read from the cache it filled)
+
+    Two layers:
+      1) in-process: one asyncio Task per key → concurrent requests of the
+         same Gunicorn worker await the same computation. The Task is detached
+         from the request that started it: if that client disconnects (its
+         request is cancelled), the load goes on for the other waiters.
+      2) cross-process: a short Redis lock (SET NX PX) → only one worker /
+         replica queries Postgres; the others poll the cache until the winner
+         has written it. If the winner dies (lock expires without a value) or
+         WAIT_TIMEOUT passes, a loser computes the value itself.
+    """
+    # shield: cancelling one waiter never cancels the shared load
+    return await asyncio.shield(_start(key, load, read_cached))
+
+
+def _start(key, load, read_cached) -> asyncio.Task:
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_load_with_lock(key, load, read_cached))
+        _inflight[key] = task
+        task.add_done_callback(lambda done: _finish(key, done))
+    return task
+
+
+def _finish(key, task):
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        # every waiter may be gone: do not warn about an un-retrieved exception
+        task.exception()
+
+
+async def _load_with_lock(key, load, read_cached):
+    redis = await get_redis()
+    lock_key = f"lock:{key}"
+    token = uuid.uuid4().hex
+
+    if await redis.set(lock_key, token, nx=True, px=LOCK_TTL_MS):
+        try:
+            return await load()
+        finally:
+            await redis.eval(_RELEASE_LUA, 1, lock_key, token)
+
+    # Another worker/replica is loading: wait for its result
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        value = await read_cached()
+        if value is not None:
+            return value
+        if not await redis.exists(lock_key):
+            break  # winner finished without a value (or died)
+
+    return await load()
+
+
+def refresh_in_background(key: str, load, read_cached):
+    """
+    Stale-while-revalidate: the caller already answered with the stale value,
+    refresh the cache without making anybody wait (still single-flight).
+    """
+    _start(key, load, read_cached)
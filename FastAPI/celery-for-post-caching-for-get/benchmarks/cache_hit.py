@@ -0,0 +1,94 @@
+"""
+Cache-hit latency of GET /items: per-call client vs shared pool, json vs msgpack/zstd.
+
+Run inside the api container (needs Redis):
+
+    python -m benchmarks.cache_hit --items 100 --requests 2000 --concurrency 50
+    python -m benchmarks.cache_hit --items 10000 --requests 500
+
+"per-call client" reproduces the old cache.py (a new redis.Redis.from_url() for
+every get_cache call, never closed).
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import redis.asyncio as redis
+
+from app import cache
+
+
+def make_items(count):
+    return [
+        {"id": i, "name": f"item-{i}", "description": f"description of item {i}"}
+        for i in range(1, count + 1)
+    ]
+
+
+async def old_get(key):
+    client = redis.Redis.from_url(cache.REDIS_URL, decode_responses=True)
+    data = await client.get(key)
+    return json.loads(data) if data else None
+
+
+async def measure(label, get, key, requests, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await get(key)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{label:<28}{statistics.median(latencies):>10.3f}{p99:>10.3f}"
+        f"{requests / elapsed:>12.0f}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    client = await cache.init_redis()
+    print(f"{args.items} items, {args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'variant':<28}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>12}")
+
+    # old layout: plain JSON string
+    await client.set("bench:old", json.dumps(items), ex=300)
+    await measure("per-call client + json", old_get, "bench:old", args.requests, args.concurrency)
+
+    variants = [("json", 0)]
+    if cache.msgpack is not None:
+        variants.append(("msgpack", 0))
+    if cache.zstandard is not None:
+        variants.append(("msgpack" if cache.msgpack else "json", 1024))
+
+    for codec, compress_min in variants:
+        cache.CACHE_CODEC, cache.CACHE_COMPRESS_MIN_BYTES = codec, compress_min
+        key = f"bench:{codec}:{compress_min}"
+        await cache.set_cache(key, items, ttl=300)
+        size = len(await client.get(key))
+        label = f"pool + {codec}{' + zstd' if compress_min else ''} ({size // 1024}KB)"
+        await measure(label, cache.get_cache, key, args.requests, args.concurrency)
+
+    print("pool:", cache.pool_stats())
+    await cache.close_redis()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
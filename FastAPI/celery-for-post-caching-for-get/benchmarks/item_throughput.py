@@ -0,0 +1,76 @@
+"""
+Items/second of create_item_task: engine per task vs persistent engine vs micro-batching.
+
+Runs the task bodies directly (no broker), from a thread pool like
+`celery worker --pool=threads`. Needs Postgres and Redis, run inside the worker container:
+
+    python -m benchmarks.item_throughput --items 2000 --concurrency 50
+
+"engine per task" reproduces the old create_item_task (asyncio.run +
+create_async_engine + engine.dispose() for every item).
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import tasks
+from app.cache import ITEMS_NAMESPACE, bump_namespace, close_redis
+from app.crud import create_item
+from app.schemas import ItemCreate
+
+
+def old_task(item_data):
+    async def _create():
+        engine = create_async_engine(tasks.DATABASE_URL, future=True)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as session:
+            await create_item(session, ItemCreate(**item_data))
+            await bump_namespace(ITEMS_NAMESPACE)
+        await engine.dispose()
+        # the Redis pool is bound to this throw-away loop as well
+        await close_redis()
+
+    asyncio.run(_create())
+
+
+def run(label, task, items, concurrency):
+    payloads = [{"name": f"bench-{i}", "description": label} for i in range(items)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(task, payloads))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{elapsed:>10.2f}{items / elapsed:>14.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{args.items} items, {args.concurrency} threads")
+    print(f"{'variant':<28}{'seconds':>10}{'items/s':>14}")
+
+    # one at a time (and fewer items): the process-wide Redis client of app.cache
+    # cannot be shared by several throw-away loops at once
+    run("engine per task", old_task, max(args.items // 10, 1), 1)
+
+    tasks.ITEM_BATCHING = False
+    run("persistent engine", tasks.create_item_task, args.items, args.concurrency)
+
+    tasks.ITEM_BATCHING = True
+    run(
+        f"micro-batch ({tasks.ITEM_BATCH_MAX}/{tasks.ITEM_BATCH_WAIT_MS}ms)",
+        tasks.create_item_task,
+        args.items,
+        args.concurrency,
+    )
+
+
+if __name__ == "__main__":
+    main()
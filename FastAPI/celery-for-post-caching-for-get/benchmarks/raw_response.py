@@ -0,0 +1,67 @@
+"""
+CPU per cache hit of GET /items: decode + validate + re-serialize vs raw bytes.
+
+No Redis or Postgres needed, it replays only the CPU work done per request:
+
+    python -m benchmarks.raw_response --limits 100 10000
+
+"old path"  = json.loads(cached) → response_model validation (list[ItemRead])
+              → dump to JSON-able python → json.dumps (what FastAPI does)
+"raw bytes" = the cached bytes are the body (get_raw → Response)
+"""
+
+import argparse
+import json
+import time
+
+from fastapi import Response
+
+from app.http_cache import make_etag
+from app.schemas import ItemListAdapter
+
+
+def make_body(count):
+    return json.dumps(
+        [
+            {"id": i, "name": f"item-{i}", "description": f"description of item {i}"}
+            for i in range(1, count + 1)
+        ]
+    ).encode()
+
+
+def old_path(cached: bytes):
+    data = json.loads(cached)
+    validated = ItemListAdapter.validate_python(data)
+    content = ItemListAdapter.dump_python(validated, mode="json")
+    return Response(json.dumps(content).encode(), media_type="application/json")
+
+
+def raw_path(cached: bytes, etag: str):
+    return Response(cached, media_type="application/json", headers={"ETag": etag})
+
+
+def cpu_per_call(fn, *args, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.process_time() - start) / repeat * 1_000_000  # µs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limits", type=int, nargs="+", default=[100, 10000])
+    args = parser.parse_args()
+
+    print(f"{'limit':>8}{'old µs':>14}{'raw µs':>14}{'saved µs':>14}{'speedup':>10}")
+    for limit in args.limits:
+        body = make_body(limit)
+        etag = make_etag(body)
+        repeat = max(10, 200_000 // limit)
+
+        old = cpu_per_call(old_path, body, repeat=repeat)
+        raw = cpu_per_call(raw_path, body, etag, repeat=repeat)
+        print(f"{limit:>8}{old:>14.1f}{raw:>14.1f}{old - raw:>14.1f}{old / raw:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
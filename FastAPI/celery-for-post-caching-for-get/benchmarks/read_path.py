@@ -0,0 +1,67 @@
+"""
+Rows/second of one GET /items page: ORM + pydantic vs Core rows vs Postgres JSON.
+
+Measures the read path only (query + JSON body), no HTTP and no Redis.
+Needs Postgres with items in the table, run inside the api container:
+
+    python -m benchmarks.read_path --limit 1000 --pages 200
+
+"ORM + pydantic" is the old path: select(Item) → ORM instances →
+ItemListAdapter.validate_python → dump_json.
+"""
+
+import argparse
+import asyncio
+import time
+
+from app import crud
+from app.db import async_session, engine
+from app.schemas import ItemListAdapter
+
+
+async def orm_page(db, limit):
+    items = await crud.list_items(db, limit=limit)
+    return ItemListAdapter.dump_json(ItemListAdapter.validate_python(items)), len(items)
+
+
+async def core_page(db, limit):
+    rows = await crud.list_item_rows(db, limit=limit)
+    body = ItemListAdapter.dump_json(
+        ItemListAdapter.validate_python([row._mapping for row in rows])
+    )
+    return body, len(rows)
+
+
+async def json_page(db, limit):
+    body, count, _ = await crud.list_items_json(db, limit=limit)
+    return body, count
+
+
+async def run(label, page, limit, pages):
+    async with async_session() as db:
+        await page(db, limit)  # warm up: connection + prepared statement
+        rows = 0
+        start = time.perf_counter()
+        for _ in range(pages):
+            _, count = await page(db, limit)
+            rows += count
+        elapsed = time.perf_counter() - start
+    print(f"{label:<20}{elapsed:>10.2f}{pages / elapsed:>12.0f}{rows / elapsed:>14.0f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{args.pages} pages of {args.limit} items")
+    print(f"{'variant':<20}{'seconds':>10}{'pages/s':>12}{'rows/s':>14}")
+    await run("ORM + pydantic", orm_page, args.limit, args.pages)
+    await run("Core rows", core_page, args.limit, args.pages)
+    await run("Postgres json_agg", json_page, args.limit, args.pages)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -7,8 +7,5 @@ alembic upgrade head
 pip freeze > requirements.txt
 
 echo "🚀 Starting Gunicorn + Uvicorn..."
-exec gunicorn app.main:app \
-  -k uvicorn.workers.UvicornWorker \
-  --bind 0.0.0.0:8000 \
-  --workers 4 \
-  --threads 2
\ No newline at end of file
+# bind / workers / threads and the Prometheus multiprocess hooks: gunicorn.conf.py
+exec gunicorn app.main:app -c gunicorn.conf.py
\ No newline at end of file
@@ -1,4 +1,5 @@
-from sqlalchemy import select
+from sqlalchemy import Integer, any_, bindparam, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
 from app.models import Item
 from app.schemas import ItemCreate
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -16,6 +17,139 @@ async def create_item(db: AsyncSession, item: ItemCreate):
     return db_item
 
 
-async def list_items(db: AsyncSession, limit: int = 100):
-    result = await db.execute(select(Item).limit(limit))
+async def get_item(db: AsyncSession, item_id: int):
+    """One item by primary key, None if it does not exist."""
+    return await db.get(Item, item_id)
+
+
+async def get_items_by_ids(db: AsyncSession, ids: list[int]):
+    """
+    Several items in ONE query, in no particular order (missing ids are skipped).
+
+    Example:
+      await get_items_by_ids(db, [3, 1, 999]) → [(1, "Book", None), (3, "Pen", None)]
+      → SELECT items.id, items.name, items.description
+        FROM items WHERE items.id = ANY($1::INTEGER[])
+
+    Core rows (attribute access: row.id, row.name), not ORM instances: the
+    caller only serializes them, so no identity map and no instance state.
+
+    The ids travel as one array parameter: same statement (and prepared
+    statement) for 2 or 1000 ids, unlike IN ($1, $2, ...).
+    """
+    if not ids:
+        return []
+    ids_param = bindparam("ids", ids, type_=ARRAY(Integer))
+    stmt = select(Item.id, Item.name, Item.description).where(
+        Item.id == any_(ids_param)
+    )
+    result = await db.execute(stmt)
+    return result.all()
+
+
+# Upper bound of one page: a single request can never load the whole table
+MAX_PAGE_SIZE = 1000
+
+
+async def list_items(db: AsyncSession, limit: int = 100, after_id: int | None = None):
+    """
+    One page of items, ordered by id (keyset / cursor pagination).
+
+    Input:
+      limit: int → page size, capped at MAX_PAGE_SIZE
+      after_id: int | None → id of the last item of the previous page
+
+    Example:
+      page 1: list_items(db, limit=100)              → ids 1..100
+      page 2: list_items(db, limit=100, after_id=100) → ids 101..200
+
+    `WHERE id > :after_id ORDER BY id LIMIT :limit` walks the primary key index,
+    so page 10 000 costs the same as page 1 (OFFSET would read and discard
+    every skipped row).
+    """
+    stmt = select(Item).order_by(Item.id).limit(min(limit, MAX_PAGE_SIZE))
+    if after_id is not None:
+        stmt = stmt.where(Item.id > after_id)
+    result = await db.execute(stmt)
     return result.scalars().all()
+
+
+def next_cursor(items, limit: int) -> int | None:
+    """Cursor of the next page (`after_id`), None on the last page."""
+    if len(items) < limit:
+        return None
+    return items[-1].id
+
+
+# One statement (and one prepared statement per connection) for every page:
+# Postgres builds the JSON body, Python never sees a row.
+# json (not jsonb) keeps the keys in the order written, like ItemRead:
+# {"id" : 1, "name" : "Book", "description" : null}
+_LIST_ITEMS_JSON = text(
+    """
+    SELECT coalesce(
+               json_agg(
+                   json_build_object(
+                       'id', page.id, 'name', page.name, 'description', page.description
+                   )
+                   ORDER BY page.id
+               ),
+               '[]'
+           )::text AS body,
+           count(*) AS count,
+           max(page.id) AS last_id
+    FROM (
+        SELECT id, name, description
+        FROM items
+        WHERE id > :after_id
+        ORDER BY id
+        LIMIT :limit
+    ) AS page
+    """
+)
+
+
+async def list_items_json(
+    db: AsyncSession, limit: int = 100, after_id: int | None = None
+):
+    """
+    Same page as `list_items`, returned as a ready JSON body (ORM bypass).
+
+    Output:
+      (body: bytes, count: int, last_id: int | None)
+
+    Example:
+      await list_items_json(db, limit=2) → (b'[{"id": 1, ...}, {"id": 2, ...}]', 2, 2)
+
+    No ORM instances, no identity map, no per-row pydantic validation: the
+    rows are aggregated into one JSON text in Postgres and sent as is.
+    """
+    params = {"after_id": after_id or 0, "limit": min(limit, MAX_PAGE_SIZE)}
+    row = (await db.execute(_LIST_ITEMS_JSON, params)).one()
+    return row.body.encode(), row.count, row.last_id
+
+
+# Rows per server-side cursor fetch of `stream_items`
+EXPORT_CHUNK_SIZE = 1000
+
+
+async def stream_items(db: AsyncSession, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    Every item ordered by id, yielded as lists of `chunk_size` Core rows.
+
+    `stream` + `yield_per` use a server-side cursor (asyncpg): Postgres
+    sends `chunk_size` rows per round trip, so memory stays flat no matter how
+    many rows the table has (`.scalars().all()` loads them all at once).
+    Rows (id, name, description) skip ORM instances and the identity map.
+
+    Example:
+      async for chunk in stream_items(db, chunk_size=2):
+          chunk → [(1, "Book", None), (2, "Pen", "Blue")], then [(3, ...)]
+    """
+    result = await db.stream(
+        select(Item.id, Item.name, Item.description)
+        .order_by(Item.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    async for chunk in result.partitions():
+        yield chunk
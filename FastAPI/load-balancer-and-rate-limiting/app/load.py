@@ -0,0 +1,174 @@
+import asyncio
+import os
+import time
+
+from starlette.responses import JSONResponse
+
+from .db import DB_MAX_OVERFLOW, DB_POOL_SIZE, engine
+from .metrics import EVENT_LOOP_LAG
+
+# --------------------
+# Overload thresholds (per worker process)
+# --------------------
+LOAD_MAX_IN_FLIGHT = int(os.getenv("LOAD_MAX_IN_FLIGHT", "200"))
+LOAD_MAX_LOOP_LAG = float(os.getenv("LOAD_MAX_LOOP_LAG_MS", "250")) / 1000
+# checked-out connections / (pool_size + max_overflow); at 1.0 the next
+# checkout waits up to DB_POOL_TIMEOUT
+LOAD_MAX_POOL_SATURATION = float(os.getenv("LOAD_MAX_POOL_SATURATION", "1.0"))
+# "1": also answer 503 to regular requests while overloaded (not only while
+# draining), so nginx retries them on another replica
+LOAD_SHED = os.getenv("LOAD_SHED", "0") == "1"
+# `touch` this file to drain every worker of the container before a deploy:
+#   docker compose exec api2 touch /tmp/drain
+# The only drain mechanism: once Gunicorn / uvicorn start a shutdown the
+# worker stops accepting at once, nothing could see a "draining" answer.
+# Touch the file, wait for nginx to route around the replica (fail_timeout),
+# then stop the container.
+DRAIN_FILE = os.getenv("DRAIN_FILE", "/tmp/drain")
+LOOP_LAG_INTERVAL = 0.5  # seconds between two event-loop lag samples
+
+# never shed: probes and scrapes must keep working on a loaded replica
+LOAD_EXEMPT = {"/healthz/load", "/metrics"}
+
+
+class LoadMonitor:
+    """
+    How busy this worker process is, cheap enough to read on every request.
+
+      in_flight: requests being handled (counted by LoadSheddingMiddleware)
+      loop_lag: how late the last LOOP_LAG_INTERVAL sleep woke up, i.e. how
+          long callbacks wait for the event loop (CPU-bound code, blocking I/O)
+      pool_saturation: DB connections checked out / pool capacity
+      draining: DRAIN_FILE exists
+
+    A replica whose DB pool is exhausted keeps few open connections at nginx
+    (least_conn sees nothing) but its requests queue on the pool: the monitor
+    reports it as overloaded.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.loop_lag = 0.0
+        self._task = None
+        self._drain_file = False
+        self._drain_checked_at = 0.0
+
+    # --------------------
+    # event-loop lag sampler
+    # --------------------
+    def start(self):
+        """Start sampling the loop lag (FastAPI lifespan)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._sample_loop_lag())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sample_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            self.loop_lag = max(loop.time() - start - LOOP_LAG_INTERVAL, 0.0)
+            EVENT_LOOP_LAG.set(self.loop_lag)
+
+    # --------------------
+    # state
+    # --------------------
+    @property
+    def draining(self) -> bool:
+        # one stat() per second at most, not one per request
+        now = time.monotonic()
+        if now - self._drain_checked_at >= 1:
+            self._drain_file = os.path.exists(DRAIN_FILE)
+            self._drain_checked_at = now
+        return self._drain_file
+
+    def pool_saturation(self) -> float:
+        return engine.sync_engine.pool.checkedout() / (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+
+    def overload_reasons(self) -> list[str]:
+        """
+        Example:
+          [] → healthy
+          ["db_pool", "loop_lag"] → pool exhausted and the loop is 300 ms late
+        """
+        reasons = []
+        if self.in_flight >= LOAD_MAX_IN_FLIGHT:
+            reasons.append("in_flight")
+        if self.loop_lag >= LOAD_MAX_LOOP_LAG:
+            reasons.append("loop_lag")
+        if self.pool_saturation() >= LOAD_MAX_POOL_SATURATION:
+            reasons.append("db_pool")
+        return reasons
+
+    def report(self) -> tuple[int, dict]:
+        """
+        Output:
+          (200, {"status": "ok", "pid": 12, "in_flight": 3, ...})
+          (503, {"status": "overloaded", "reasons": ["db_pool"], ...})
+          (503, {"status": "draining", ...})
+        """
+        reasons = self.overload_reasons()
+        if self.draining:
+            status = "draining"
+        elif reasons:
+            status = "overloaded"
+        else:
+            status = "ok"
+        body = {
+            "status": status,
+            "ready": status == "ok",
+            "pid": os.getpid(),
+            "in_flight": self.in_flight,
+            "loop_lag_ms": round(self.loop_lag * 1000, 2),
+            "db_pool_saturation": round(self.pool_saturation(), 3),
+            "reasons": reasons,
+        }
+        return (200 if status == "ok" else 503), body
+
+
+load_monitor = LoadMonitor()
+
+
+class LoadSheddingMiddleware:
+    """
+    ASGI middleware: counts in-flight requests for `load_monitor` and answers
+    503 (Retry-After: 1, Connection: close) instead of running the endpoint
+    while the worker is draining, or overloaded when LOAD_SHED=1.
+
+    nginx (`proxy_next_upstream ... http_503`) retries idempotent requests on
+    another replica and, after max_fails 503s, stops sending traffic to this
+    one for fail_timeout seconds.
+    """
+
+    def __init__(self, app, monitor: LoadMonitor = load_monitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in LOAD_EXEMPT:
+            await self.app(scope, receive, send)
+            return
+
+        monitor = self.monitor
+        if monitor.draining or (LOAD_SHED and monitor.overload_reasons()):
+            response = JSONResponse(
+                {"detail": "Service Unavailable"},
+                status_code=503,
+                headers={"Retry-After": "1", "Connection": "close"},
+            )
+            await response(scope, receive, send)
+            return
+
+        monitor.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            monitor.in_flight -= 1
@@ -1,8 +1,20 @@
-from typing import Annotated
-from fastapi import FastAPI, Depends, HTTPException
+from typing import Annotated, Literal
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST
 from app.db import get_session
 from . import crud, schemas
-from .db import engine, get_session
+from .db import async_session, engine, get_session, warm_pool
+from .http_cache import json_response, not_modified, snapshot_etag
+from .load import LoadSheddingMiddleware, load_monitor
+from .metrics import latest_metrics
+from .middleware import MetricsMiddleware
+from .ratelimit import (
+    RATE_LIMIT_ENABLED,
+    REDIS_URL,
+    RateLimiter,
+    RateLimitMiddleware,
+)
 from sqlalchemy.ext.asyncio import AsyncEngine
 from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -13,22 +25,45 @@ SessionDep = Annotated[AsyncSession, Depends(get_session)]
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("🚀 Starting up... Testing DB connection")
+    print("🚀 Starting up... Warming the DB connection pool")
     try:
-        async with engine.begin() as conn:
-            await conn.run_sync(lambda x: None)
+        await warm_pool()
         print("✅ DB connection OK")
     except Exception as e:
         print("❌ DB connection failed:", e)
         raise e
 
+    if RATE_LIMIT_ENABLED:
+        try:
+            await limiter.client.ping()
+            print("✅ Redis (rate limiter) OK")
+        except Exception as e:
+            # not fatal: the limiter fails open until Redis is back
+            print("⚠️ Redis (rate limiter) unreachable:", e)
+
+    # event-loop lag sampler of /healthz/load (app/load.py)
+    load_monitor.start()
+
     yield
 
     print("🔻 Shutting down... Closing engine")
+    await load_monitor.stop()
     await engine.dispose()
+    await limiter.close()
 
 
+# One Redis client per worker process, shared buckets for api1..api3
+limiter = RateLimiter(REDIS_URL)
+
 app = FastAPI(lifespan=lifespan)
+# per client (X-API-Key or IP) and route budgets (app/ratelimit.py); added
+# first so it runs inside MetricsMiddleware and 429s are counted as well
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, limiter=limiter, routes=app.router.routes)
+# in-flight count of /healthz/load, 503 while draining (app/load.py)
+app.add_middleware(LoadSheddingMiddleware)
+# per-route request count / latency / in-flight (app/middleware.py)
+app.add_middleware(MetricsMiddleware, routes=app.router.routes)
 
 
 @app.post("/items", response_model=schemas.ItemRead, status_code=201)
@@ -37,7 +72,152 @@ async def create_item_endpoint(item: schemas.ItemCreate, db=Depends(get_session)
     return created
 
 
+def next_page_headers(request: Request, next_id: int | None) -> dict:
+    """
+    Link / X-Next-Cursor headers pointing at the next page (none on the last page).
+
+    Example:
+      Link: <http://api/items?limit=100&after_id=100>; rel="next"
+      X-Next-Cursor: 100
+    """
+    if next_id is None:
+        return {}
+    url = request.url.include_query_params(after_id=next_id)
+    return {"Link": f'<{url}>; rel="next"', "X-Next-Cursor": str(next_id)}
+
+
+def parse_ids(ids: str) -> list[int]:
+    """
+    "3,1,3" → [3, 1] (request order, duplicates removed), 422 on bad input.
+    """
+    try:
+        parsed = list(dict.fromkeys(int(i) for i in ids.split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(
+            status_code=422, detail="ids must be comma-separated integers"
+        )
+    if not parsed or len(parsed) > crud.MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=422, detail=f"ids must contain 1 to {crud.MAX_PAGE_SIZE} ids"
+        )
+    return parsed
+
+
 @app.get("/items", response_model=list[schemas.ItemRead])
-async def get_items_endpoint(limit: int = 100, db=Depends(get_session)):
-    items = await crud.list_items(db, limit=limit)
-    return items
+async def get_items_endpoint(
+    request: Request,
+    limit: int = Query(100, ge=1, le=crud.MAX_PAGE_SIZE),
+    after_id: int | None = Query(None, ge=0),
+    ids: str | None = Query(None, description="e.g. 1,2,3 → those items only"),
+    db=Depends(get_session),
+):
+    wanted = parse_ids(ids) if ids is not None else None
+    # nothing committed since the client's copy: 304 without the page query
+    etag = await snapshot_etag(db)
+    if (response := not_modified(request, etag)) is not None:
+        return response
+
+    if wanted is not None:
+        # batch lookup: one WHERE id = ANY(...) query, missing ids are skipped
+        found = {item.id: item for item in await crud.get_items_by_ids(db, wanted)}
+        items = [found[item_id] for item_id in wanted if item_id in found]
+        return json_response(request, items_json(items), etag=etag)
+
+    # JSON built by Postgres (json_agg): no ORM objects, no per-row validation
+    body, count, last_id = await crud.list_items_json(
+        db, limit=limit, after_id=after_id
+    )
+    headers = next_page_headers(request, last_id if count == limit else None)
+    return json_response(request, body, headers, etag=etag)
+
+
+def items_json(items) -> bytes:
+    # ORM objects or Core rows → JSON bytes (validated like response_model)
+    adapter = schemas.ItemListAdapter
+    return adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+
+
+def item_json(item) -> str:
+    # ORM object or Core row → '{"id":1,"name":"Book","description":null}'
+    return schemas.ItemRead.model_validate(item, from_attributes=True).model_dump_json()
+
+
+async def export_items_body(fmt: str):
+    """
+    Body of GET /items/export, one HTTP chunk per cursor fetch.
+
+    ndjson: one JSON object per line → {"id":1,...}
+                                        {"id":2,...}
+    json:   one JSON array, written piece by piece → [{"id":1,...},{"id":2,...}]
+
+    Opens its own session: the body is sent after the endpoint has returned.
+    """
+    async with async_session() as session:
+        if fmt == "json":
+            yield b"["
+        first = True
+        async for chunk in crud.stream_items(session):
+            rows = [item_json(item) for item in chunk]
+            if fmt == "ndjson":
+                yield ("\n".join(rows) + "\n").encode()
+            else:
+                yield (("" if first else ",") + ",".join(rows)).encode()
+            first = False
+        if fmt == "json":
+            yield b"]"
+
+
+@app.get("/items/export")
+async def export_items_endpoint(
+    fmt: Literal["ndjson", "json"] = Query("ndjson", alias="format"),
+):
+    """
+    Stream every item without building the list in memory:
+      curl -N http://localhost:8000/items/export              → NDJSON
+      curl -N http://localhost:8000/items/export?format=json  → JSON array
+    """
+    media_type = "application/x-ndjson" if fmt == "ndjson" else "application/json"
+    return StreamingResponse(
+        export_items_body(fmt),
+        media_type=media_type,
+        headers={"X-Accel-Buffering": "no"},  # nginx: pass chunks through as they come
+    )
+
+
+# declared after /items/export, otherwise "export" would be matched as an {item_id}
+@app.get("/items/{item_id}", response_model=schemas.ItemRead)
+async def get_item_endpoint(request: Request, item_id: int, db=Depends(get_session)):
+    etag = await snapshot_etag(db)
+    if (response := not_modified(request, etag)) is not None:
+        return response
+    item = await crud.get_item(db, item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return json_response(request, item_json(item).encode(), etag=etag)
+
+
+@app.get("/healthz/load", include_in_schema=False)
+async def load_health_endpoint():
+    """
+    Load of the worker process that answers: in-flight requests, event-loop
+    lag, DB pool saturation and readiness. 503 when overloaded or draining,
+    so a balancer / health checker takes the replica out of rotation.
+
+    async: answered by the event loop itself, so a stalled loop shows up as a
+    slow probe (a sync def would run in the threadpool and measure that).
+
+    Example:
+      GET /healthz/load → 200 {"status": "ok", "in_flight": 3, "loop_lag_ms": 0.4,
+                                "db_pool_saturation": 0.2, ...}
+    """
+    status_code, body = load_monitor.report()
+    return JSONResponse(
+        body, status_code=status_code, headers={"Cache-Control": "no-store"}
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    # Prometheus scrape (app/metrics.py): HTTP and DB pool metrics of every
+    # Gunicorn worker when PROMETHEUS_MULTIPROC_DIR is set
+    return Response(latest_metrics(), media_type=CONTENT_TYPE_LATEST)
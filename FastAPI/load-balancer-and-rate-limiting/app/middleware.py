@@ -0,0 +1,83 @@
+import time
+
+from starlette.routing import Match
+
+from .metrics import HTTP_REQUEST_LATENCY, HTTP_REQUESTS, HTTP_REQUESTS_IN_PROGRESS
+
+UNMATCHED_ROUTE = "<unmatched>"  # 404s of random URLs share one series
+
+
+def route_template(routes, scope) -> str:
+    """
+    Path template of the route a request matches, e.g. "/items/{item_id}".
+
+    The same matching Starlette's router does, done up front so middlewares
+    can label / limit by route before the endpoint runs. Stored in the scope:
+    the next middleware does not match again.
+    """
+    template = scope.get("route_template")
+    if template is not None:
+        return template
+    partial = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            template = route.path
+            break
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path  # path matches, method does not (405)
+    template = template or partial or UNMATCHED_ROUTE
+    scope["route_template"] = template
+    return template
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: request count, latency and in-flight requests per route.
+
+    Usage:
+        app.add_middleware(MetricsMiddleware, routes=app.router.routes)
+
+    Labels:
+      method: "GET"
+      route: "/items/{item_id}" (the template the request matches)
+      status: "200" (count only)
+
+    Latency is measured up to the last body chunk, so a StreamingResponse
+    (GET /items/export) is timed until it is fully sent. A request that
+    raises is counted with status 500.
+
+    Pure ASGI (no BaseHTTPMiddleware): no extra task and no body buffering
+    per request.
+    """
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(self.routes, scope)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method=method, route=route)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_LATENCY.labels(method=method, route=route).observe(
+                time.perf_counter() - start
+            )
+            HTTP_REQUESTS.labels(method=method, route=route, status=str(status)).inc()
+            in_progress.dec()
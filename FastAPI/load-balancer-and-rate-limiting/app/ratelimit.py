@@ -0,0 +1,276 @@
+import hashlib
+import math
+import os
+import time
+from dataclasses import dataclass
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+from .middleware import route_template
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+# seconds; a slow Redis must not hold every request: past this the limiter
+# fails open (see RateLimiter)
+REDIS_SOCKET_TIMEOUT = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", "0.25"))
+# seconds without calling Redis after a failure (circuit breaker, see RateLimiter)
+REDIS_RETRY_AFTER = float(os.getenv("RATE_LIMIT_REDIS_RETRY_AFTER", "5"))
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+# "<requests>/<seconds>" per client and route; the bucket holds a full period
+# of requests, so a client may burst up to <requests> at once
+RATE_LIMIT_DEFAULT = os.getenv("RATE_LIMIT_DEFAULT", "50/1")
+RATE_LIMIT_ROUTES = {
+    "POST /items": os.getenv("RATE_LIMIT_CREATE", "10/1"),
+    "GET /items/export": os.getenv("RATE_LIMIT_EXPORT", "2/60"),
+}
+# comma-separated API keys that get a bucket of their own; any other
+# X-API-Key is ignored (limited by IP), so a made-up key buys no new budget
+RATE_LIMIT_API_KEYS = os.getenv("RATE_LIMIT_API_KEYS", "")
+# never limited: scrapes and health checks come from the infrastructure
+RATE_LIMIT_EXEMPT = {"/metrics", "/healthz/load", "/docs", "/openapi.json"}
+# locally remembered blocked clients (see RateLimiter.blocked_until)
+LOCAL_BLOCK_MAX_ENTRIES = 10_000
+
+# GCRA (generic cell rate algorithm): one key per bucket holding its
+# "theoretical arrival time" (TAT) in ms. Atomic in Redis and every replica
+# shares the clock of Redis (TIME), not its own.
+#   KEYS[1] = bucket, ARGV[1] = emission interval (ms per request),
+#   ARGV[2] = burst tolerance (ms)
+# Returns {allowed, remaining, retry_after_ms, reset_ms}
+_GCRA_LUA = """
+local emission = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local tat = tonumber(redis.call("GET", KEYS[1]))
+if tat == nil or tat < now then
+    tat = now
+end
+local new_tat = tat + emission
+local allow_at = new_tat - tolerance
+
+if allow_at > now then
+    return {0, 0, allow_at - now, tat - now}
+end
+redis.call("SET", KEYS[1], new_tat, "PX", math.ceil(new_tat - now))
+return {1, math.floor((now - allow_at) / emission), 0, new_tat - now}
+"""
+
+
+@dataclass(frozen=True)
+class Rate:
+    """
+    Example:
+      Rate.parse("10/1") → 10 requests per second
+    """
+
+    limit: int
+    period: float  # seconds
+
+    @classmethod
+    def parse(cls, value: str) -> "Rate":
+        limit, _, period = value.partition("/")
+        return cls(int(limit), float(period or 1))
+
+    @property
+    def policy(self) -> str:
+        # RateLimit-Policy: 10;w=1
+        return f"{self.limit};w={self.period:g}"
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    remaining: int
+    retry_after: float  # seconds, 0 when allowed
+    reset: float  # seconds until the bucket is full again
+
+
+class RateLimiter:
+    """
+    Cluster-wide token buckets (GCRA) shared by api1..api3 through Redis.
+
+    Usage:
+        limiter = RateLimiter("redis://localhost:6379")
+        decision = await limiter.hit("GET /items:ip:10.0.0.7", Rate.parse("50/1"))
+        decision → Decision(allowed=True, remaining=49, retry_after=0.0, reset=0.02)
+
+    One Lua script (EVALSHA) per request: read the bucket, decide, write it
+    back, atomically, so replicas never over-admit between a read and a write.
+
+    Local pre-check: a denied bucket stays denied at least `retry_after`
+    seconds whatever the other replicas do (they can only move it further
+    away). Until then this process answers 429 without calling Redis, so a
+    client hammering an exhausted budget costs no Redis round trip.
+
+    Fail open: if Redis is unreachable or slower than REDIS_SOCKET_TIMEOUT
+    the request is allowed (the nginx per-IP limit still applies) and a
+    warning is printed. After a failure Redis is not called at all for
+    REDIS_RETRY_AFTER seconds (every request is allowed at once instead of
+    each waiting for its own timeout), then one request tries it again.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_connections: int = REDIS_MAX_CONNECTIONS,
+        timeout: float = REDIS_SOCKET_TIMEOUT,
+    ):
+        self.client = redis.Redis.from_url(
+            url,
+            max_connections=max_connections,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout,
+        )
+        self.script = self.client.register_script(_GCRA_LUA)
+        self.blocked_until = {}  # bucket key -> monotonic deadline
+        self.local_rejections = 0
+        self._last_error = 0.0
+        self._redis_down_until = 0.0  # monotonic; circuit open until then
+
+    async def hit(self, key: str, rate: Rate) -> Decision | None:
+        """One request against the bucket `key`. None when Redis failed."""
+        now = time.monotonic()
+        deadline = self.blocked_until.get(key)
+        if deadline is not None:
+            if now < deadline:
+                self.local_rejections += 1
+                return Decision(False, 0, deadline - now, deadline - now)
+            del self.blocked_until[key]
+
+        if now < self._redis_down_until:
+            return None
+
+        emission_ms = rate.period * 1000 / rate.limit
+        try:
+            allowed, remaining, retry_ms, reset_ms = await self.script(
+                keys=[f"rl:{key}"], args=[emission_ms, rate.period * 1000]
+            )
+        except (RedisError, OSError) as e:
+            self._redis_down_until = now + REDIS_RETRY_AFTER
+            if now - self._last_error > 10:  # at most one warning per 10s
+                print(f"⚠️ rate limiter unavailable, allowing requests: {e!r}")
+                self._last_error = now
+            return None
+
+        decision = Decision(bool(allowed), remaining, retry_ms / 1000, reset_ms / 1000)
+        if not decision.allowed:
+            self._block(key, now + decision.retry_after)
+        return decision
+
+    def _block(self, key, deadline):
+        if len(self.blocked_until) >= LOCAL_BLOCK_MAX_ENTRIES:
+            now = time.monotonic()
+            self.blocked_until = {
+                k: d for k, d in self.blocked_until.items() if d > now
+            }
+            if len(self.blocked_until) >= LOCAL_BLOCK_MAX_ENTRIES:
+                return  # still full: only Redis decides for this one
+        self.blocked_until[key] = deadline
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def key_id(api_key: str) -> str:
+    # hashed, the key itself is never stored (Redis keys, memory)
+    return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+KNOWN_API_KEYS = frozenset(
+    key_id(key.strip()) for key in RATE_LIMIT_API_KEYS.split(",") if key.strip()
+)
+
+
+def client_id(scope, headers, known_keys=KNOWN_API_KEYS) -> str:
+    """
+    Who is limited: the API key when it is a known one, otherwise the client IP.
+
+    Example:
+      X-API-Key: secret (in RATE_LIMIT_API_KEYS) → "key:2bb80d537b1da3e3"
+      X-API-Key: made-up                         → "ip:10.0.0.7"
+      no key                                     → "ip:10.0.0.7"
+
+    The IP is X-Real-IP (set by nginx), else the peer address.
+
+    Trusting any key would give a client a fresh bucket per random key.
+    """
+    api_key = headers.get("x-api-key")
+    if api_key:
+        client = key_id(api_key)
+        if client in known_keys:
+            return client
+    ip = headers.get("x-real-ip") or (scope.get("client") or ("unknown",))[0]
+    return f"ip:{ip}"
+
+
+def ratelimit_headers(rate: Rate, decision: Decision) -> dict:
+    """RateLimit-* headers (IETF draft), plus Retry-After on a 429."""
+    headers = {
+        "RateLimit-Limit": str(rate.limit),
+        "RateLimit-Remaining": str(decision.remaining),
+        "RateLimit-Reset": str(math.ceil(decision.reset)),
+        "RateLimit-Policy": rate.policy,
+    }
+    if not decision.allowed:
+        headers["Retry-After"] = str(math.ceil(decision.retry_after))
+    return headers
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware: one bucket per client (API key or IP) and route.
+
+    Usage:
+        app.add_middleware(
+            RateLimitMiddleware, limiter=limiter, routes=app.router.routes
+        )
+
+    Rates: RATE_LIMIT_ROUTES["<METHOD> <route template>"], else RATE_LIMIT_DEFAULT.
+    Every limited response carries RateLimit-* headers; over the limit the
+    endpoint is not called and the answer is 429 with Retry-After. On the
+    routes nginx caches, nginx enforces the read budget itself and drops the
+    per-client Remaining / Reset headers (nginx/nginx.conf).
+    """
+
+    def __init__(self, app, limiter: RateLimiter, routes):
+        self.app = app
+        self.limiter = limiter
+        self.routes = routes
+        self.default_rate = Rate.parse(RATE_LIMIT_DEFAULT)
+        self.route_rates = {
+            route: Rate.parse(value) for route, value in RATE_LIMIT_ROUTES.items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in RATE_LIMIT_EXEMPT:
+            await self.app(scope, receive, send)
+            return
+
+        route = f"{scope['method']} {route_template(self.routes, scope)}"
+        rate = self.route_rates.get(route, self.default_rate)
+        client = client_id(scope, Headers(scope=scope))
+        decision = await self.limiter.hit(f"{route}:{client}", rate)
+        if decision is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = ratelimit_headers(rate, decision)
+        if not decision.allowed:
+            response = JSONResponse(
+                {"detail": "Too Many Requests"}, status_code=429, headers=headers
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
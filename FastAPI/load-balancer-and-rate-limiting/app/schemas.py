@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 
 class ItemCreate(BaseModel):
@@ -10,3 +10,7 @@ class ItemRead(BaseModel):
     id: int
     name: str
     description: str | None = None
+
+
+# list[ItemRead] serializer, built once: ItemListAdapter.dump_json(...) → JSON bytes
+ItemListAdapter = TypeAdapter(list[ItemRead])
@@ -0,0 +1,33 @@
+"""
+Gunicorn settings: `gunicorn app.main:app -c gunicorn.conf.py` (entrypoint.sh).
+
+Prometheus multiprocess mode: each worker process writes its metrics to files
+in PROMETHEUS_MULTIPROC_DIR and GET /metrics (served by any worker) adds up the
+files of all of them (app/metrics.py).
+"""
+
+import os
+import shutil
+
+# must be set before prometheus_client is imported, here and in the workers
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus")
+
+from prometheus_client import multiprocess  # noqa: E402
+
+bind = "0.0.0.0:8000"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+threads = 2
+
+
+def on_starting(server):
+    # files left by a previous run would be added to the new values
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    # a dead (or recycled) worker's live gauges leave the sums; its counters
+    # and histograms are kept so totals never go backwards
+    multiprocess.mark_process_dead(worker.pid)
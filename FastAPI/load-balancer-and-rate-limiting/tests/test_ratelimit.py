@@ -0,0 +1,77 @@
+"""
+GCRA limiter against a real Redis (skipped when none is reachable).
+
+    docker compose up -d redis
+    pip install pytest && python -m pytest tests   # from this directory
+"""
+
+import asyncio
+import os
+import uuid
+
+import pytest
+
+from app.ratelimit import Rate, RateLimiter, client_id, key_id
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _hits(rate: Rate, count: int):
+    # a fresh limiter (and Redis client) per event loop, a fresh bucket per test
+    limiter = RateLimiter(REDIS_URL)
+    key = f"test:{uuid.uuid4().hex}"
+    try:
+        decisions = [await limiter.hit(key, rate) for _ in range(count)]
+        return decisions, limiter.local_rejections
+    finally:
+        await limiter.client.delete(f"rl:{key}")
+        await limiter.close()
+
+
+@pytest.fixture(scope="module")
+def redis_available():
+    async def ping():
+        limiter = RateLimiter(REDIS_URL)
+        try:
+            await limiter.client.ping()
+        finally:
+            await limiter.close()
+
+    try:
+        run(ping())
+    except Exception as e:
+        pytest.skip(f"Redis not reachable at {REDIS_URL}: {e!r}")
+
+
+@pytest.mark.usefixtures("redis_available")
+def test_burst_then_deny():
+    # 4/1 → one request every 250 ms, a burst of 4
+    decisions, _ = run(_hits(Rate.parse("4/1"), 5))
+
+    assert [d.allowed for d in decisions] == [True, True, True, True, False]
+    assert [d.remaining for d in decisions] == [3, 2, 1, 0, 0]
+    assert decisions[0].retry_after == 0
+    assert 0 < decisions[4].retry_after <= 0.25
+
+
+@pytest.mark.usefixtures("redis_available")
+def test_denied_bucket_is_answered_locally():
+    decisions, local_rejections = run(_hits(Rate.parse("1/60"), 3))
+
+    assert [d.allowed for d in decisions] == [True, False, False]
+    # the 2nd request asked Redis, the 3rd hit the local block
+    assert local_rejections == 1
+    assert decisions[2].retry_after <= decisions[1].retry_after
+
+
+def test_unknown_api_key_is_limited_by_ip():
+    scope = {"client": ("10.0.0.7", 51000)}
+    known = frozenset({key_id("secret")})
+
+    assert client_id(scope, {"x-api-key": "secret"}, known) == key_id("secret")
+    assert client_id(scope, {"x-api-key": "made-up"}, known) == "ip:10.0.0.7"
+    assert client_id(scope, {}, known) == "ip:10.0.0.7"